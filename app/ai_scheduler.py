@@ -1,17 +1,31 @@
 import os
 import asyncio
+import logging
 import subprocess
 import json
+import time
 from typing import List, Optional
 from datetime import datetime, timedelta
 
 from app.models import Task, TaskPriority
+from app import nl_parser
+from app.metrics import (IFLOW_CPU, IFLOW_FALLBACKS, IFLOW_IN_FLIGHT, IFLOW_LATENCY, IFLOW_QUEUED,
+                         NL_PARSE_LATENCY, NL_PARSE_TOTAL)
+from app.supervisor import ResourceLimits, RunResult, run_supervised
+
+logger = logging.getLogger(__name__)
 
 
 class AIScheduler:
     def __init__(self):
         """Initialize AI scheduler with iFlow CLI integration."""
         self.iflow_command = os.getenv("IFLOW_COMMAND", "iflow")
+        self.iflow_timeout = float(os.getenv("IFLOW_TIMEOUT", "60"))
+        self.iflow_limits = ResourceLimits.from_env("IFLOW")
+        # Caps concurrent iFlow processes; further runs wait for a free slot
+        self._iflow_slots = asyncio.Semaphore(int(os.getenv("IFLOW_MAX_CONCURRENCY", "4")))
+        # Local natural-language parses at or above this confidence skip iFlow
+        self.nl_min_confidence = float(os.getenv("NL_PARSER_MIN_CONFIDENCE", "0.7"))
     
     async def schedule_tasks(self, tasks: List[Task]) -> List[Task]:
         """
@@ -74,7 +88,9 @@ class AIScheduler:
                 return list(task_map.values())
             
         except Exception as e:
-            print(f"iFlow scheduling failed, falling back to rule-based: {e}")
+            logger.warning("iFlow scheduling failed, falling back to rule-based: %s", e)
+        
+        IFLOW_FALLBACKS.inc(operation="schedule")
         
         # Fallback: simple rule-based scheduling without iFlow
         return self._rule_based_schedule(tasks)
@@ -139,7 +155,9 @@ class AIScheduler:
                 return result_lower == "true"
             
         except Exception as e:
-            print(f"iFlow permission check failed, using fallback: {e}")
+            logger.warning("iFlow permission check failed, using fallback: %s", e)
+        
+        IFLOW_FALLBACKS.inc(operation="permission_check")
         
         # Fallback: simple keyword-based analysis
         return self._check_permission_fallback(task)
@@ -162,23 +180,26 @@ class AIScheduler:
             """
             
             # Run iFlow CLI with prompt
-            result = await self._run_iflow(prompt)
+            result = await self._run_iflow_process(prompt)
             
-            if result is not None:
+            if result is not None and result.ok:
                 return {
                     "success": True,
                     "message": "Task execution triggered successfully",
-                    "iflow_response": result
+                    "iflow_response": result.stdout.decode().strip(),
+                    "resource_usage": result.usage()
                 }
             else:
                 return {
                     "success": False,
-                    "message": "iFlow execution failed"
+                    "message": "iFlow execution timed out" if result is not None and result.timed_out else "iFlow execution failed",
+                    "resource_usage": result.usage() if result is not None else None
                 }
                 
         except Exception as e:
             # If iFlow CLI is not available, simulate execution
-            print(f"iFlow CLI not available, simulating execution: {e}")
+            logger.warning("iFlow CLI not available, simulating execution: %s", e)
+            IFLOW_FALLBACKS.inc(operation="execute")
             return {
                 "success": True,
                 "message": "Task execution simulated (iFlow CLI not available)",
@@ -194,40 +215,82 @@ class AIScheduler:
         """
         Run iFlow CLI with the given prompt and return the output.
         """
+        result = await self._run_iflow_process(prompt)
+        if result is None or not result.ok:
+            return None
+        return result.stdout.decode().strip()
+    
+    async def _run_iflow_process(self, prompt: str) -> Optional[RunResult]:
+        """
+        Run iFlow CLI under supervision: its own process group, rlimits, a hard
+        timeout and a cap on concurrent runs. Returns None if it could not start.
+        """
+        with IFLOW_QUEUED.track_inprogress():
+            await self._iflow_slots.acquire()
+        
+        start = time.perf_counter()
+        outcome = "error"
         try:
-            # Run iFlow CLI in non-interactive mode with prompt
-            process = await asyncio.create_subprocess_exec(
-                self.iflow_command,
-                "-p", prompt,
-                stdout=asyncio.subprocess.PIPE,
-                stderr=asyncio.subprocess.PIPE
-            )
+            with IFLOW_IN_FLIGHT.track_inprogress():
+                # Run iFlow CLI in non-interactive mode with prompt
+                result = await run_supervised(
+                    [self.iflow_command, "-p", prompt],
+                    timeout=self.iflow_timeout,
+                    limits=self.iflow_limits
+                )
             
-            stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=60.0)
-            
-            if process.returncode == 0:
-                return stdout.decode().strip()
+            if result.timed_out:
+                outcome = "timeout"
+                logger.warning("iFlow CLI timed out after %.0fs, process group killed", self.iflow_timeout)
+            elif result.returncode == 0:
+                outcome = "ok"
             else:
-                print(f"iFlow CLI error: {stderr.decode()}")
-                return None
+                logger.warning("iFlow CLI error (exit %s): %s", result.returncode, result.stderr.decode())
+            if result.cpu_seconds is not None:
+                IFLOW_CPU.observe(result.cpu_seconds)
+            logger.info("iFlow run finished: %s", result.usage())
+            return result
                 
-        except asyncio.TimeoutError:
-            print("iFlow CLI timed out")
-            return None
         except Exception as e:
-            print(f"Error running iFlow CLI: {e}")
+            logger.warning("Error running iFlow CLI: %s", e)
             return None
+        finally:
+            self._iflow_slots.release()
+            IFLOW_LATENCY.observe(time.perf_counter() - start, outcome=outcome)
     
-    async def parse_natural_language_input(self, input: str) -> dict:
+    async def parse_natural_language_input(self, input: str, categories: Optional[List[str]] = None) -> dict:
         """
         Parse natural language input to extract task creation, filtering, and sorting information.
         Returns a structured dict with fields for New Task, Filter, and Sort forms.
+        
+        Simple inputs are handled by the local parser; iFlow is only asked
+        when the local parse is not confident enough.
         """
+        start = time.perf_counter()
+        parsed, confidence = nl_parser.parse(input, categories or [])
+        if confidence >= self.nl_min_confidence:
+            NL_PARSE_TOTAL.inc(parser="local")
+            NL_PARSE_LATENCY.observe(time.perf_counter() - start, parser="local")
+            return parsed
+        
+        try:
+            return await self._parse_natural_language_via_iflow(input, categories)
+        finally:
+            NL_PARSE_TOTAL.inc(parser="ai")
+            NL_PARSE_LATENCY.observe(time.perf_counter() - start, parser="ai")
+    
+    async def _parse_natural_language_via_iflow(self, input: str, categories: Optional[List[str]]) -> dict:
+        """Parse natural language input with iFlow, returning empty sections on failure."""
+        known_categories = ""
+        if categories:
+            known_categories = f"Existing categories (prefer these when one fits): {', '.join(categories)}"
+        
         try:
             prompt = f"""
             Parse the following natural language input and extract information for a TODO application.
             
             Input: {input}
+            {known_categories}
             
             Extract information for three forms:
             1. New Task (for creating a new task)
@@ -316,7 +379,9 @@ class AIScheduler:
                 return parsed
             
         except Exception as e:
-            print(f"iFlow natural language parsing failed: {e}")
+            logger.warning("iFlow natural language parsing failed: %s", e)
+        
+        IFLOW_FALLBACKS.inc(operation="parse_natural_language")
         
         # Return empty structure on failure
         return {
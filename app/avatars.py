@@ -0,0 +1,103 @@
+import hashlib
+import io
+import logging
+import os
+import re
+from pathlib import Path
+from typing import Iterable, Optional
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:  # pragma: no cover - listed in requirements.txt; uploads are size-capped without it
+    Image = ImageOps = None
+
+logger = logging.getLogger(__name__)
+
+# Longest side of a stored avatar in pixels; larger uploads are downscaled when Pillow is installed
+AVATAR_MAX_SIZE = int(os.getenv("AVATAR_MAX_SIZE", "256"))
+
+# Largest avatar file stored, after downscaling; this also bounds uploads when Pillow is missing
+AVATAR_MAX_BYTES = int(os.getenv("AVATAR_MAX_BYTES", str(512 * 1024)))
+
+# Content-addressed avatar names: first 32 hex digits of the SHA-256 of the stored bytes
+HASHED_NAME = re.compile(r"^([0-9a-f]{32})\.[a-z0-9]+$")
+
+# Files the store manages (and may garbage-collect): hashed names and legacy avatar_<random> uploads
+MANAGED_NAME = re.compile(r"^(?:[0-9a-f]{32}|avatar_[0-9a-f]+)\.[a-z0-9]+$")
+
+
+def content_hash(filename: str) -> Optional[str]:
+    """Content hash embedded in a stored avatar's name, or None for legacy names."""
+    match = HASHED_NAME.match(filename)
+    return match.group(1) if match else None
+
+
+def downscale(data: bytes, max_size: int = AVATAR_MAX_SIZE) -> bytes:
+    """Shrink an image so neither side exceeds max_size, keeping its format.
+
+    Returns the input unchanged if Pillow is not installed, the image is
+    already small enough, is animated, or cannot be decoded.
+    """
+    if Image is None or max_size <= 0:
+        return data
+    try:
+        with Image.open(io.BytesIO(data)) as original:
+            if getattr(original, "is_animated", False) or max(original.size) <= max_size:
+                return data
+            image_format = original.format
+            # Saving drops the EXIF orientation tag, so rotate the pixels upright first
+            image = ImageOps.exif_transpose(original)
+            image.thumbnail((max_size, max_size))
+            output = io.BytesIO()
+            image.save(output, format=image_format, optimize=True)
+    except Exception:  # pylint: disable=broad-exception-caught
+        logger.warning("Could not downscale avatar, storing it as uploaded", exc_info=True)
+        return data
+    result = output.getvalue()
+    return result if len(result) < len(data) else data
+
+
+class AvatarStore:
+    """Content-addressed avatar files.
+
+    Files are named after the hash of their contents, so identical uploads
+    share one file, a name never refers to different bytes (which makes the
+    files safe to cache forever), and files no profile refers to can be
+    garbage-collected.
+    """
+
+    def __init__(self, avatars_dir: Path):
+        self.avatars_dir = avatars_dir
+
+    def save(self, data: bytes, ext: str) -> Path:
+        """Store an uploaded image and return its path; re-uploads reuse the existing file.
+
+        Raises ValueError if the image is still larger than AVATAR_MAX_BYTES
+        after downscaling.
+        """
+        data = downscale(data)
+        if len(data) > AVATAR_MAX_BYTES:
+            raise ValueError(f"Avatar image is too large ({len(data) // 1024} KB, "
+                             f"limit {AVATAR_MAX_BYTES // 1024} KB); please upload a smaller image")
+        ext = re.sub(r"[^a-z0-9]", "", ext.lower()) or "bin"
+        path = self.avatars_dir / f"{hashlib.sha256(data).hexdigest()[:32]}.{ext}"
+        if not path.exists():
+            tmp_path = path.with_name(path.name + ".tmp")
+            with open(tmp_path, 'wb') as f:
+                f.write(data)
+            os.replace(tmp_path, path)
+        return path
+
+    def collect_garbage(self, keep: Iterable[str]) -> int:
+        """Delete managed avatar files whose names are not in keep; returns how many were removed."""
+        keep = set(keep)
+        removed = 0
+        for path in self.avatars_dir.iterdir():
+            if path.name in keep or not MANAGED_NAME.match(path.name):
+                continue
+            try:
+                path.unlink()
+                removed += 1
+            except OSError:
+                logger.warning("Could not remove orphaned avatar %s", path, exc_info=True)
+        return removed
@@ -0,0 +1,141 @@
+import os
+import zlib
+from typing import Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # pragma: no cover - optional, gzip is used without it
+    brotli = None
+
+# Responses with smaller bodies are sent uncompressed (streamed responses are always compressed)
+COMPRESSION_MIN_SIZE = int(os.getenv("COMPRESSION_MIN_SIZE", "1024"))
+
+# Moderate levels: most of the size reduction for a fraction of the CPU time of the maximum
+GZIP_LEVEL = 6
+BROTLI_QUALITY = 5
+
+# Only text-like bodies are compressed; images are already compressed and
+# event streams must reach the client as soon as each event is written
+COMPRESSIBLE_TYPES = frozenset((
+    "application/json", "application/x-ndjson", "application/javascript", "application/x-tar",
+    "image/svg+xml", "text/css", "text/html", "text/javascript", "text/plain",
+))
+
+
+def choose_encoding(accept_encoding: str) -> Optional[str]:
+    """Preferred content coding the client accepts: br (if brotli is installed), gzip or None."""
+    accepted = set()
+    for part in accept_encoding.lower().split(","):
+        coding, _, params = part.partition(";")
+        quality = params.replace(" ", "")
+        if quality.startswith("q=") and quality[2:].strip("0.") == "":
+            # q=0 means "not acceptable"
+            continue
+        accepted.add(coding.strip())
+    if brotli is not None and "br" in accepted:
+        return "br"
+    if "gzip" in accepted:
+        return "gzip"
+    return None
+
+
+class _Compressor:
+    """Incremental gzip or brotli encoder."""
+
+    def __init__(self, encoding: str):
+        self.encoding = encoding
+        if encoding == "br":
+            self._brotli = brotli.Compressor(quality=BROTLI_QUALITY)
+        else:
+            self._zlib = zlib.compressobj(GZIP_LEVEL, zlib.DEFLATED, 16 + zlib.MAX_WBITS)
+
+    def compress(self, data: bytes, final: bool) -> bytes:
+        """Encode data; chunks are flushed so streamed output reaches the client as it is produced."""
+        if self.encoding == "br":
+            return self._brotli.process(data) + (self._brotli.finish() if final else self._brotli.flush())
+        return self._zlib.compress(data) + self._zlib.flush(zlib.Z_FINISH if final else zlib.Z_SYNC_FLUSH)
+
+
+class CompressionMiddleware:
+    """Compress text-like responses with brotli or gzip, as negotiated with the client.
+
+    Unlike Starlette's GZipMiddleware, event streams and binary content are
+    passed through untouched, streamed chunks are flushed as they are
+    written, and brotli is used when the brotli package is installed.
+    """
+
+    def __init__(self, app: ASGIApp, minimum_size: int = COMPRESSION_MIN_SIZE):
+        self.app = app
+        self.minimum_size = minimum_size
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        encoding = None
+        if scope["type"] == "http":
+            encoding = choose_encoding(Headers(scope=scope).get("accept-encoding", ""))
+        if encoding is None:
+            await self.app(scope, receive, send)
+            return
+        await _CompressingResponder(self.app, encoding, self.minimum_size)(scope, receive, send)
+
+
+class _CompressingResponder:
+    """Compresses a single response, deciding when its first body chunk arrives."""
+
+    def __init__(self, app: ASGIApp, encoding: str, minimum_size: int):
+        self.app = app
+        self.encoding = encoding
+        self.minimum_size = minimum_size
+        self.send: Optional[Send] = None
+        self.start_message: Optional[Message] = None
+        self.compressor: Optional[_Compressor] = None
+        self.passthrough = False
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send):
+        self.send = send
+        await self.app(scope, receive, self.send_compressed)
+
+    def _should_compress(self, body: bytes, more_body: bool) -> bool:
+        headers = Headers(raw=self.start_message["headers"])
+        content_type = headers.get("content-type", "").split(";")[0].strip().lower()
+        return (content_type in COMPRESSIBLE_TYPES
+                and "content-encoding" not in headers
+                and "content-range" not in headers
+                and (more_body or len(body) >= self.minimum_size))
+
+    async def send_compressed(self, message: Message):
+        if message["type"] == "http.response.start":
+            # Held back until the first body chunk shows whether to compress
+            self.start_message = message
+            return
+        if message["type"] != "http.response.body" or self.passthrough:
+            await self.send(message)
+            return
+
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if self.compressor is None:
+            if not self._should_compress(body, more_body):
+                self.passthrough = True
+                await self.send(self.start_message)
+                await self.send(message)
+                return
+            self.compressor = _Compressor(self.encoding)
+            headers = MutableHeaders(raw=self.start_message["headers"])
+            headers["Content-Encoding"] = self.encoding
+            headers.add_vary_header("Accept-Encoding")
+            # The encoded bytes differ from the original, so a strong validator no longer applies
+            etag = headers.get("etag")
+            if etag and not etag.startswith("W/"):
+                headers["ETag"] = "W/" + etag
+            body = self.compressor.compress(body, final=not more_body)
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                headers["Content-Length"] = str(len(body))
+            await self.send(self.start_message)
+        else:
+            body = self.compressor.compress(body, final=not more_body)
+        await self.send({"type": "http.response.body", "body": body, "more_body": more_body})
@@ -0,0 +1,293 @@
+import bisect
+import logging
+import threading
+from datetime import date, datetime
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional, Tuple
+
+from app import serialization
+from app.records import PRIORITIES, STATUSES, TaskRecord, TaskTable
+from app.rollups import Rollups
+
+logger = logging.getLogger(__name__)
+
+# Task fields whose changes are recorded
+HISTORY_FIELDS = ("title", "description", "category", "priority", "status",
+                  "due_date", "ai_suggested_time", "has_ai_button")
+DATETIME_HISTORY_FIELDS = ("due_date", "ai_suggested_time")
+
+OPERATIONS = {"c": "created", "u": "updated", "d": "deleted"}
+
+# A (time, offset) checkpoint is kept every this many events, for seeking by time
+CHECKPOINT_INTERVAL = 256
+
+# Minimum number of events between snapshots of the full task state used by as_of().
+# Snapshots are also spaced at least as many events apart as there are live tasks,
+# so together they hold about as many entries as the log has events.
+SNAPSHOT_MIN_EVENTS = 1024
+
+
+def _field_value(record: TaskRecord, field: str):
+    if field == "priority":
+        return PRIORITIES[record.priority].value
+    if field == "status":
+        return STATUSES[record.status].value
+    if field in DATETIME_HISTORY_FIELDS:
+        # Recorded like tasks.json does (ISO 8601, keeping any UTC offset)
+        return record.get_datetime(field)
+    return getattr(record, field)
+
+
+def _delta(old: Optional[TaskRecord], new: TaskRecord) -> dict:
+    """Fields of new that differ from old (all tracked fields for a new task)."""
+    values = {field: _field_value(new, field) for field in HISTORY_FIELDS}
+    if old is None:
+        return values
+    return {field: value for field, value in values.items() if value != _field_value(old, field)}
+
+
+def _to_api(fields: dict) -> dict:
+    """Render stored field values for API responses.
+
+    Datetimes are recorded as ISO strings and passed through unchanged;
+    logs written by earlier versions hold POSIX timestamps instead.
+    """
+    result = dict(fields)
+    for field in DATETIME_HISTORY_FIELDS:
+        if isinstance(result.get(field), (int, float)):
+            result[field] = datetime.fromtimestamp(result[field])
+    return result
+
+
+def _apply(state: Dict[str, dict], event: dict):
+    """Apply one event to a task state map without modifying the field dicts in it.
+
+    Field dicts are replaced rather than updated, so snapshots can share them.
+    """
+    task_id = event["id"]
+    if event["op"] == "d":
+        state.pop(task_id, None)
+    elif event["op"] == "c":
+        state[task_id] = event["f"]
+    else:
+        state[task_id] = {**state.get(task_id, {}), **event["f"]}
+
+
+class _HistoryIndex:  # pylint: disable=too-many-instance-attributes
+    """In-memory index over the first indexed_bytes bytes of a history file."""
+
+    def __init__(self):
+        self.indexed_bytes = 0
+        self.event_count = 0
+        self.last_time = 0.0
+        self.checkpoints: List[Tuple[float, int]] = []
+        self.task_offsets: Dict[str, List[int]] = {}
+        self.rollups = Rollups()
+        # Current tracked fields per task, and (time, offset, state) snapshots of it
+        # taken before the event at offset
+        self.state: Dict[str, dict] = {}
+        self.snapshots: List[Tuple[float, int, Dict[str, dict]]] = []
+        self._events_since_snapshot = 0
+
+    def add(self, event: dict, offset: int):
+        if self._events_since_snapshot >= max(SNAPSHOT_MIN_EVENTS, len(self.state)):
+            self.snapshots.append((self.last_time, offset, dict(self.state)))
+            self._events_since_snapshot = 0
+        # Clock adjustments can make times go backwards; keep the index monotonic
+        self.last_time = max(event["t"], self.last_time)
+        if self.event_count % CHECKPOINT_INTERVAL == 0:
+            self.checkpoints.append((self.last_time, offset))
+        self.event_count += 1
+        self._events_since_snapshot += 1
+        self.task_offsets.setdefault(event["id"], []).append(offset)
+        self.rollups.add(event)
+        _apply(self.state, event)
+
+
+class TaskHistory:
+    """Append-only log of task changes, kept next to the task store.
+
+    Each line of history.ndjson is one event holding only the fields that
+    changed (the full tracked fields when a task is created). The log is
+    indexed in memory: byte offsets per task, sparse (time, offset)
+    checkpoints for seeking by time, periodic snapshots of every task's
+    state for point-in-time queries, and per-day, per-category rollups, so
+    queries never rescan the whole file. Lines appended by other
+    processes are picked up on the next query.
+
+    Registered as a Storage listener.
+    """
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._lock = threading.RLock()
+        self._index = _HistoryIndex()
+
+    # Writing
+
+    def task_changed(self, old: Optional[TaskRecord], new: Optional[TaskRecord]):
+        """Storage listener hook: append an event for a created, updated or deleted task."""
+        self.tasks_changed([(old, new)])
+
+    def tasks_changed(self, changes: List[Tuple[Optional[TaskRecord], Optional[TaskRecord]]]):
+        """Storage listener hook for bulk writes: append the events of all changes at once."""
+        now = datetime.now().timestamp()
+        events = []
+        for old, new in changes:
+            if new is None:
+                events.append({"t": now, "id": old.id, "op": "d"})
+                continue
+            fields = _delta(old, new)
+            if fields:
+                events.append({"t": now, "id": new.id, "op": "c" if old is None else "u", "f": fields})
+        if events:
+            self._append(events)
+
+    def tasks_loaded(self, table: TaskTable):
+        """Storage listener hook: start the log of an existing store with its current tasks.
+
+        Only happens once, when there is no history file yet; each task is
+        recorded as created at its created_at time, marked "seed": true since
+        the log does not know when it actually reached its current state
+        (e.g. when it was completed). The file is created exclusively, so when several processes load the same store only the
+        first one seeds it.
+        """
+        with self._lock:
+            if self.path.exists() or not table.records:
+                return
+            records = sorted(table.records, key=lambda record: record.timestamp("created_at"))
+            try:
+                self._write([{"t": record.timestamp("created_at"), "id": record.id, "op": "c",
+                              "f": _delta(None, record), "seed": True}
+                             for record in records], mode="xb")
+            except FileExistsError:
+                self._catch_up()
+
+    def _append(self, events: List[dict]):
+        with self._lock:
+            self._write(events)
+
+    def _write(self, events: List[dict], mode: str = "ab"):
+        data = b"".join(serialization.dumps_json(event) + b"\n" for event in events)
+        # A single append-mode write, so concurrent writers never interleave within a line
+        with open(self.path, mode) as f:
+            f.write(data)
+        self._catch_up()
+
+    # Indexing
+
+    def _catch_up(self):
+        """Index events appended since the last call, by this or another process."""
+        try:
+            size = self.path.stat().st_size
+        except FileNotFoundError:
+            size = 0
+        if size < self._index.indexed_bytes:
+            # File was replaced or truncated; start over
+            self._index = _HistoryIndex()
+        if size == self._index.indexed_bytes:
+            return
+
+        index = self._index
+        with open(self.path, "rb") as f:
+            f.seek(index.indexed_bytes)
+            offset = index.indexed_bytes
+            for line in f:
+                if not line.endswith(b"\n"):
+                    # Partially written by another process; index it next time
+                    break
+                try:
+                    index.add(serialization.loads(line), offset)
+                except ValueError:
+                    logger.warning("Skipping unreadable history line at byte %d of %s", offset, self.path)
+                offset += len(line)
+        index.indexed_bytes = offset
+
+    # Queries
+
+    def events(self, start: Optional[float] = None, end: Optional[float] = None) -> Iterator[dict]:
+        """Events with start <= time <= end (POSIX timestamps), oldest first."""
+        with self._lock:
+            self._catch_up()
+            checkpoints = self._index.checkpoints
+            stop = self._index.indexed_bytes
+            offset = 0
+            if start is not None and checkpoints:
+                # Last checkpoint strictly before start; everything earlier can be skipped
+                position = bisect.bisect_left(checkpoints, (start,)) - 1
+                offset = checkpoints[max(position, 0)][1]
+        for event in self._read(offset, stop, end):
+            if start is None or event["t"] >= start:
+                yield event
+
+    def _read(self, offset: int, stop: int, end: Optional[float] = None,
+              last_time: float = 0.0) -> Iterator[dict]:
+        """Events between two byte offsets, stopping once the (monotonic) time passes end."""
+        if stop <= offset:
+            return
+        with open(self.path, "rb") as f:
+            f.seek(offset)
+            while f.tell() < stop:
+                line = f.readline()
+                try:
+                    event = serialization.loads(line)
+                except ValueError:
+                    continue
+                last_time = max(event["t"], last_time)
+                if end is not None and last_time > end:
+                    return
+                yield event
+
+    def task_changes(self, task_id: str) -> List[dict]:
+        """Change log of one task, oldest first."""
+        with self._lock:
+            self._catch_up()
+            offsets = list(self._index.task_offsets.get(task_id, ()))
+        if not offsets:
+            # Also covers stores without a history file yet
+            return []
+        changes = []
+        with open(self.path, "rb") as f:
+            for offset in offsets:
+                f.seek(offset)
+                event = serialization.loads(f.readline())
+                changes.append({
+                    "at": datetime.fromtimestamp(event["t"]),
+                    "operation": OPERATIONS[event["op"]],
+                    "changes": _to_api(event.get("f", {})),
+                })
+        return changes
+
+    def as_of(self, when: datetime) -> List[dict]:
+        """Tracked fields of every task that existed at the given time.
+
+        Starts from the latest snapshot taken before that time and replays
+        only the events after it.
+        """
+        end = when.timestamp()
+        with self._lock:
+            self._catch_up()
+            index = self._index
+            stop = index.indexed_bytes
+            if index.last_time <= end:
+                # Every indexed event is in range, so the current state is the answer
+                snapshot = (index.last_time, stop, index.state)
+            else:
+                position = bisect.bisect_right(index.snapshots, (end, float("inf"))) - 1
+                snapshot = index.snapshots[position] if position >= 0 else (0.0, 0, {})
+            last_time, offset, state = snapshot[0], snapshot[1], dict(snapshot[2])
+        for event in self._read(offset, stop, end, last_time):
+            _apply(state, event)
+        return [{"id": task_id, **_to_api(fields)} for task_id, fields in state.items()]
+
+    def timeseries(self, start: date, end: date, bucket: str = "day", *, category: Optional[str] = None,
+                   by_category: bool = False) -> List[dict]:
+        """Tasks created, completed and deleted per day, week or month (see Rollups.series)."""
+        with self._lock:
+            self._catch_up()
+            return self._index.rollups.series(start, end, bucket, category=category, by_category=by_category)
+
+    def throughput(self, start: date, end: date) -> List[dict]:
+        """Tasks created and completed per day from start to end inclusive."""
+        return [{"date": day["start"], "created": day["created"], "completed": day["completed"]}
+                for day in self.timeseries(start, end)]
@@ -0,0 +1,34 @@
+from bisect import bisect_left, bisect_right, insort
+from typing import List, Optional, Tuple
+
+
+class DueDateIndex:
+    """Tasks with a due date, kept sorted by (due timestamp, task id).
+
+    Updated incrementally as tasks change, so range lookups cost
+    O(log n + k) instead of a scan over every task.
+    """
+
+    def __init__(self, entries=()):
+        self._entries: List[Tuple[float, str]] = sorted(entries)
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def add(self, due: Optional[float], task_id: str):
+        if due is not None:
+            insort(self._entries, (due, task_id))
+
+    def remove(self, due: Optional[float], task_id: str):
+        if due is None:
+            return
+        i = bisect_left(self._entries, (due, task_id))
+        if i < len(self._entries) and self._entries[i] == (due, task_id):
+            del self._entries[i]
+
+    def range(self, start: Optional[float] = None, end: Optional[float] = None) -> List[str]:
+        """IDs of tasks due in [start, end], earliest first. Open bounds are unlimited."""
+        lo = bisect_left(self._entries, (start,)) if start is not None else 0
+        # (end, chr(0x10FFFF)) sorts after every entry due exactly at end
+        hi = bisect_right(self._entries, (end, chr(0x10FFFF))) if end is not None else len(self._entries)
+        return [task_id for _, task_id in self._entries[lo:hi]]
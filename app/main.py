@@ -1,39 +1,218 @@
+import time
+
+# Measured from here so the startup report covers the app's own imports
+IMPORT_STARTED = time.perf_counter()
+
+# pylint: disable=wrong-import-position
 import os
+import asyncio
+import cProfile
+import logging
+from contextlib import asynccontextmanager
 from pathlib import Path
-from typing import List, Optional
-from fastapi import FastAPI, Request, HTTPException
+from datetime import date, datetime, timedelta
+from typing import List, Literal, Optional
+from fastapi import FastAPI, Request, HTTPException, Query, Depends
+from fastapi.exceptions import RequestValidationError
 from fastapi.staticfiles import StaticFiles
 from fastapi.templating import Jinja2Templates
-from fastapi.responses import HTMLResponse, FileResponse
+from fastapi.responses import HTMLResponse, FileResponse, Response, StreamingResponse, PlainTextResponse
 from dotenv import load_dotenv
+from pydantic import ValidationError
 
 from app.models import Task, TaskCreate, TaskUpdate, TaskStatus, Category, Statistics, UserProfile, UserProfileUpdate
 from app.storage import Storage
+from app.records import TASK_FIELDS, TaskRecord
+from app.serialization import dumps_json
 from app.ai_scheduler import AIScheduler
-import requests
+from app.reminders import ReminderEngine
+from app.avatars import content_hash
+from app.compression import CompressionMiddleware
+from app.transfer import TaskImporter, iter_ndjson, iter_tar
+from app.workspaces import WorkspaceRegistry, DEFAULT_WORKSPACE
+from app.metrics import REGISTRY, HTTP_REQUESTS, HTTP_LATENCY, CANVAS_LATENCY, profile_report
+# pylint: enable=wrong-import-position
 
 # Load environment variables
 load_dotenv()
 
+
+# Startup timings and readiness, served by /api/ready
+startup_report = {"ready": False, "import_ms": None, "warm_up_ms": None, "tasks": None, "error": None}
+
+# uvicorn configures this logger, so the startup report shows up next to its own output
+startup_logger = logging.getLogger("uvicorn.error")
+
+
+async def warm_up_storage():
+    """Load the task table off the event loop and mark the app ready."""
+    start = time.perf_counter()
+    try:
+        startup_report["tasks"] = await asyncio.to_thread(workspaces.get(DEFAULT_WORKSPACE).warm_up)
+    except Exception as e:  # pylint: disable=broad-exception-caught
+        startup_report["error"] = str(e)
+        startup_logger.exception("Storage warm-up failed")
+        return
+    startup_report["warm_up_ms"] = round((time.perf_counter() - start) * 1000, 1)
+    startup_report["ready"] = True
+    startup_logger.info("Open2Do ready: imports %.1f ms, warm-up %.1f ms, %d tasks",
+                        startup_report["import_ms"], startup_report["warm_up_ms"], startup_report["tasks"])
+
+
+@asynccontextmanager
+async def lifespan(_app: FastAPI):
+    """Run the reminder engine for the lifetime of the server.
+    
+    Storage warm-up runs in the background so the server binds immediately;
+    /api/ready reports when it has finished.
+    """
+    startup_report["import_ms"] = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
+    reminder_task = asyncio.create_task(reminder_engine.run())
+    warm_up_task = asyncio.create_task(warm_up_storage())
+    yield
+    warm_up_task.cancel()
+    reminder_task.cancel()
+
+
 # Initialize FastAPI app
-app = FastAPI(title="Open2Do", description="Local web-based TODO application with AI automation")
+app = FastAPI(title="Open2Do", description="Local web-based TODO application with AI automation", lifespan=lifespan)
+
+# Compress JSON, NDJSON exports and static text assets (brotli when installed, otherwise gzip)
+app.add_middleware(CompressionMiddleware)
+
+# Per-request profiling (?profile=1) is opt-in, as it slows the whole server down while active
+PROFILING_ENABLED = os.getenv("PROFILING_ENABLED", "false").lower() in ("1", "true", "yes")
 
 # Get data directory from environment or use default
 DATA_DIR = os.getenv("DATA_DIR", str(Path(__file__).parent.parent / "data"))
 
+# Longest range served by the trend endpoints (/api/statistics/throughput and /timeseries)
+MAX_TREND_DAYS = 3660
+
+# Workspaces other than the default one live under WORKSPACES_DIR, one directory each
+WORKSPACES_DIR = os.getenv("WORKSPACES_DIR", str(Path(DATA_DIR) / "workspaces"))
+
 # Initialize storage and AI scheduler
-storage = Storage(DATA_DIR)
+workspaces = WorkspaceRegistry(
+    DATA_DIR,
+    WORKSPACES_DIR,
+    max_open=int(os.getenv("MAX_OPEN_WORKSPACES", "16")),
+    storage_format=os.getenv("STORAGE_FORMAT")
+)
 ai_scheduler = AIScheduler()
 
+# Reminder engine, kept in sync with task changes through the storage listener hooks
+reminder_engine = ReminderEngine()
+workspaces.add_listener(reminder_engine)
+
 # Mount static files and templates
 app.mount("/static", StaticFiles(directory="app/static"), name="static")
 templates = Jinja2Templates(directory="app/templates")
 
 
+@app.middleware("http")
+async def record_metrics(request: Request, call_next):
+    """Record per-route latency and status counts, and profile requests when asked to."""
+    profiler = None
+    if PROFILING_ENABLED and request.query_params.get("profile") == "1":
+        profiler = cProfile.Profile()
+        profiler.enable()
+    
+    start = time.perf_counter()
+    status = 500
+    try:
+        response = await call_next(request)
+        status = response.status_code
+    finally:
+        # Label by route template, not raw path, to keep label cardinality bounded
+        route = request.scope.get("route")
+        route_path = route.path if route is not None else "unmatched"
+        HTTP_LATENCY.observe(time.perf_counter() - start, method=request.method, route=route_path)
+        HTTP_REQUESTS.inc(method=request.method, route=route_path, status=status)
+        if profiler is not None:
+            profiler.disable()
+    
+    if profiler is not None:
+        return PlainTextResponse(profile_report(profiler))
+    return response
+
+
+def check_workspace(name: str) -> str:
+    """Reject workspace names that cannot be used as directory names."""
+    try:
+        workspaces.path_for(name)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+    return name
+
+
+async def get_workspace(request: Request) -> str:
+    """Workspace selected by the X-Workspace header, ?workspace= or the workspace cookie."""
+    return check_workspace(request.headers.get("x-workspace")
+                           or request.query_params.get("workspace")
+                           or request.cookies.get("workspace")
+                           or DEFAULT_WORKSPACE)
+
+
+async def get_storage(workspace: str = Depends(get_workspace)) -> Storage:
+    """Storage of the request's workspace, with its tasks loaded.
+    
+    Handlers call storage synchronously, so a table that is not resident yet
+    is loaded in a thread first. While the startup warm-up is still running,
+    this waits for it without blocking the event loop, so /api/ready, static
+    files and other requests keep being served.
+    """
+    storage = workspaces.get(workspace)
+    if not storage.is_loaded():
+        await asyncio.to_thread(storage.warm_up)
+    return storage
+
+
+async def get_task_fields(fields: Optional[str] = None) -> Optional[List[str]]:
+    """Fields requested with ?fields=id,title,... for task lists, or None for all of them.
+    
+    The ID is always included, so clients can load a task's details later.
+    """
+    if fields is None:
+        return None
+    requested = [field.strip() for field in fields.split(",") if field.strip()]
+    unknown = [field for field in requested if field not in TASK_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown fields: {', '.join(unknown)}")
+    return ["id"] + [field for field in dict.fromkeys(requested) if field != "id"]
+
+
+def task_list_response(tasks: List[TaskRecord], fields: Optional[List[str]]) -> Response:
+    """JSON response for a list of task records, projected to fields if given."""
+    if fields is None:
+        return json_response({"tasks": [task.to_dict() for task in tasks]})
+    return json_response({"tasks": [task.project(fields) for task in tasks]})
+
+
+def check_trend_range(start: date, end: date):
+    """Reject reversed or overly long date ranges for the trend endpoints."""
+    if start > end or (end - start).days > MAX_TREND_DAYS:
+        raise HTTPException(status_code=400, detail=f"Range must be 1 to {MAX_TREND_DAYS} days")
+
+
+def json_response(payload) -> Response:
+    """Serialize already JSON-ready data directly, skipping FastAPI's encoder."""
+    return Response(content=dumps_json(payload), media_type="application/json")
+
+
 @app.get("/", response_class=HTMLResponse)
 async def index(request: Request):
-    """Render the main TODO list page."""
-    return templates.TemplateResponse("index.html", {"request": request})
+    """Render the main TODO list page.
+    
+    Opening /?workspace=<name> switches the browser to that workspace for
+    later API calls (remembered in a cookie).
+    """
+    response = templates.TemplateResponse("index.html", {"request": request})
+    workspace = request.query_params.get("workspace")
+    if workspace is not None:
+        check_workspace(workspace)
+        response.set_cookie("workspace", workspace, samesite="lax")
+    return response
 
 
 @app.get("/dashboard", response_class=HTMLResponse)
@@ -45,31 +224,73 @@ async def dashboard(request: Request):
 # API Routes
 
 @app.get("/api/tasks")
-async def get_tasks(category: Optional[str] = None, status: Optional[str] = None):
-    """Get all tasks, optionally filtered by category and status."""
+async def get_tasks(
+    category: Optional[str] = None,
+    status: Optional[str] = None,
+    fields: Optional[List[str]] = Depends(get_task_fields),
+    storage: Storage = Depends(get_storage)
+):
+    """Get all tasks, optionally filtered by category and status and limited to some fields."""
     task_status = TaskStatus(status) if status else None
-    tasks = storage.get_tasks(category=category, status=task_status)
-    return {"tasks": [task.model_dump() for task in tasks]}
+    tasks = storage.get_task_records(category=category, status=task_status)
+    return task_list_response(tasks, fields)
+
+
+@app.get("/api/tasks/due")
+async def get_due_tasks(
+    start: Optional[datetime] = Query(None, alias="from"),
+    end: Optional[datetime] = Query(None, alias="to"),
+    status: Optional[TaskStatus] = None,
+    overdue: bool = False,
+    *,
+    fields: Optional[List[str]] = Depends(get_task_fields),
+    storage: Storage = Depends(get_storage)
+):
+    """Get tasks due in a date range, earliest first.
+    
+    With overdue=true, returns unfinished tasks whose due date has passed.
+    """
+    if overdue:
+        tasks = storage.get_due_task_records(end=datetime.now(), status=status, exclude_completed=True)
+    else:
+        tasks = storage.get_due_task_records(start=start, end=end, status=status)
+    return task_list_response(tasks, fields)
+
+
+@app.get("/api/tasks/{task_id}/history")
+async def get_task_history(task_id: str, storage: Storage = Depends(get_storage)):
+    """Get the recorded changes of a task, oldest first (also available after it was deleted)."""
+    changes = storage.history.task_changes(task_id)
+    if not changes:
+        raise HTTPException(status_code=404, detail="No history for this task")
+    return json_response({"task_id": task_id, "changes": changes})
+
+
+@app.get("/api/history")
+async def get_history_as_of(at: datetime, storage: Storage = Depends(get_storage)):
+    """Get the tasks as they were at the given time."""
+    tasks = await asyncio.to_thread(storage.history.as_of, at)
+    return json_response({"at": at, "tasks": tasks})
 
 
 @app.get("/api/tasks/{task_id}")
-async def get_task(task_id: str):
+async def get_task(task_id: str, storage: Storage = Depends(get_storage)):
     """Get a specific task by ID."""
-    task = storage.get_task(task_id)
+    task = storage.get_task_record(task_id)
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
-    return task.model_dump()
+    return json_response(task.to_dict())
 
 
 @app.post("/api/tasks")
-async def create_task(task_create: TaskCreate):
+async def create_task(task_create: TaskCreate, storage: Storage = Depends(get_storage)):
     """Create a new task."""
     task = storage.create_task(task_create)
     return task.model_dump()
 
 
 @app.post("/api/parse-natural-language")
-async def parse_natural_language(request: dict):
+async def parse_natural_language(request: dict, storage: Storage = Depends(get_storage)):
     """Parse natural language input to extract task/filter/sort information."""
     input_text = request.get("input", "")
     
@@ -77,7 +298,8 @@ async def parse_natural_language(request: dict):
         raise HTTPException(status_code=400, detail="Input text is required")
     
     try:
-        parsed_data = await ai_scheduler.parse_natural_language_input(input_text)
+        categories = [category.name for category in storage.get_categories()]
+        parsed_data = await ai_scheduler.parse_natural_language_input(input_text, categories)
         return {
             "success": True,
             "data": parsed_data
@@ -87,16 +309,20 @@ async def parse_natural_language(request: dict):
 
 
 @app.put("/api/tasks/{task_id}")
-async def update_task(task_id: str, task_update: TaskUpdate):
+async def update_task(task_id: str, task_update: TaskUpdate, storage: Storage = Depends(get_storage)):
     """Update a task."""
-    task = storage.update_task(task_id, task_update)
+    try:
+        task = storage.update_task(task_id, task_update)
+    except ValidationError as e:
+        # The merged task is invalid, e.g. null for a field the task requires
+        raise RequestValidationError([{**error, "loc": ("body", *error["loc"])} for error in e.errors()])
     if not task:
         raise HTTPException(status_code=404, detail="Task not found")
     return task.model_dump()
 
 
 @app.delete("/api/tasks/{task_id}")
-async def delete_task(task_id: str):
+async def delete_task(task_id: str, storage: Storage = Depends(get_storage)):
     """Delete a task."""
     success = storage.delete_task(task_id)
     if not success:
@@ -105,53 +331,187 @@ async def delete_task(task_id: str):
 
 
 @app.get("/api/tasks/search/{query}")
-async def search_tasks(query: str):
+async def search_tasks(
+    query: str,
+    fields: Optional[List[str]] = Depends(get_task_fields),
+    storage: Storage = Depends(get_storage)
+):
     """Search tasks by title or description."""
-    tasks = storage.search_tasks(query)
-    return {"tasks": [task.model_dump() for task in tasks]}
+    tasks = storage.search_task_records(query)
+    return task_list_response(tasks, fields)
 
 
 @app.get("/api/categories")
-async def get_categories():
+async def get_categories(storage: Storage = Depends(get_storage)):
     """Get all categories."""
     categories = storage.get_categories()
     return {"categories": [cat.model_dump() for cat in categories]}
 
 
 @app.get("/api/statistics")
-async def get_statistics():
+async def get_statistics(storage: Storage = Depends(get_storage)):
     """Get task statistics."""
     stats = storage.get_statistics()
     return stats.model_dump()
 
 
+@app.get("/api/export")
+async def export_tasks(folders: bool = False, storage: Storage = Depends(get_storage)):
+    """Stream all tasks as NDJSON, or with folders=true as a tar of tasks.ndjson and the task folders."""
+    if folders:
+        return StreamingResponse(iter_tar(storage), media_type="application/x-tar",
+                                 headers={"Content-Disposition": 'attachment; filename="open2do-export.tar"'})
+    return StreamingResponse(iter_ndjson(storage), media_type="application/x-ndjson",
+                             headers={"Content-Disposition": 'attachment; filename="open2do-tasks.ndjson"'})
+
+
+@app.post("/api/import")
+async def import_tasks(
+    request: Request,
+    batch_size: int = Query(1000, ge=1, le=10000),
+    replace: bool = False,
+    storage: Storage = Depends(get_storage)
+):
+    """Import tasks from an NDJSON request body (as produced by /api/export).
+    
+    The body is read incrementally and validated in batches of batch_size
+    lines; validated tasks are stored every few seconds (see TaskImporter),
+    so memory use is bounded and the store is not rewritten for every batch.
+    """
+    importer = TaskImporter(storage, batch_size=batch_size, replace=replace)
+    remainder = b""
+    async for chunk in request.stream():
+        *lines, remainder = (remainder + chunk).split(b"\n")
+        for line in lines:
+            if importer.add(line):
+                await asyncio.to_thread(importer.flush)
+    importer.add(remainder)
+    await asyncio.to_thread(importer.finish)
+    return importer.summary()
+
+
+@app.get("/api/statistics/throughput")
+async def get_throughput(
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    storage: Storage = Depends(get_storage)
+):
+    """Get tasks created and completed per day; defaults to the last 14 days."""
+    end = end or date.today()
+    start = start or end - timedelta(days=13)
+    check_trend_range(start, end)
+    return {"days": storage.history.throughput(start, end)}
+
+
+@app.get("/api/statistics/timeseries")
+async def get_timeseries(
+    start: Optional[date] = Query(None, alias="from"),
+    end: Optional[date] = Query(None, alias="to"),
+    bucket: Literal["day", "week", "month"] = "day",
+    *,
+    category: Optional[str] = None,
+    by_category: bool = False,
+    storage: Storage = Depends(get_storage)
+):
+    """Get tasks created, completed and deleted per day, week or month.
+    
+    Defaults to the last 30 days, 12 weeks or 12 months. Served from
+    precomputed rollups, so the cost depends on the range, not the number
+    of tasks.
+    
+    Completions are counted each time a task is set to completed, including
+    tasks created or imported as completed, so a task that is reopened and
+    completed again counts twice.
+    """
+    end = end or date.today()
+    start = start or end - {"day": timedelta(days=29), "week": timedelta(weeks=11), "month": timedelta(days=334)}[bucket]
+    check_trend_range(start, end)
+    series = storage.history.timeseries(start, end, bucket, category=category, by_category=by_category)
+    return {"bucket": bucket, "from": start, "to": end, "series": series}
+
+
+@app.get("/api/reminders/stream")
+async def stream_reminders(workspace: str = Depends(get_workspace), storage: Storage = Depends(get_storage)):
+    """Push reminder events (due dates and AI-suggested times) as Server-Sent Events."""
+    queue = reminder_engine.subscribe(workspace)
+    
+    async def events():
+        try:
+            while True:
+                try:
+                    event = await asyncio.wait_for(queue.get(), timeout=15.0)
+                    yield b"event: reminder\ndata: " + dumps_json(event) + b"\n\n"
+                except asyncio.TimeoutError:
+                    # Comment line keeps proxies from closing an idle connection
+                    yield b": keep-alive\n\n"
+                    # With several workers, tasks may have been changed by another
+                    # process; reloading them (only if the file changed) reschedules reminders.
+                    # A reload can take seconds, so it runs off the event loop.
+                    await asyncio.to_thread(storage.warm_up)
+        finally:
+            reminder_engine.unsubscribe(queue)
+    
+    return StreamingResponse(events(), media_type="text/event-stream", headers={"Cache-Control": "no-cache"})
+
+
+@app.get("/api/ready")
+async def get_ready():
+    """Readiness probe: 503 until the task table has been loaded."""
+    return Response(content=dumps_json(startup_report), media_type="application/json",
+                    status_code=200 if startup_report["ready"] else 503)
+
+
+@app.get("/api/metrics")
+async def get_metrics():
+    """Expose application metrics in Prometheus text format."""
+    return PlainTextResponse(REGISTRY.render(), media_type="text/plain; version=0.0.4")
+
+
 # User Profile Routes
 
 @app.get("/api/user-profile")
-async def get_user_profile():
+async def get_user_profile(storage: Storage = Depends(get_storage)):
     """Get user profile."""
     profile = storage.get_user_profile()
     return profile.model_dump()
 
 
 @app.put("/api/user-profile")
-async def update_user_profile(profile_update: UserProfileUpdate):
+async def update_user_profile(profile_update: UserProfileUpdate, storage: Storage = Depends(get_storage)):
     """Update user profile."""
-    profile = storage.update_user_profile(profile_update)
+    try:
+        profile = storage.update_user_profile(profile_update)
+    except ValueError as e:
+        # Undecodable or oversized avatar uploads
+        raise HTTPException(status_code=400, detail=str(e))
     return profile.model_dump()
 
 
 @app.get("/api/user-profile/avatar/{filename}")
-async def get_avatar(filename: str):
-    """Get user avatar image."""
+async def get_avatar(filename: str, request: Request, storage: Storage = Depends(get_storage)):
+    """Get user avatar image.
+    
+    Content-hashed avatars never change, so they are served with a strong
+    ETag and cached by the browser indefinitely.
+    """
     avatar_path = storage.avatars_dir / filename
-    if not avatar_path.exists():
+    if not avatar_path.is_file():
         raise HTTPException(status_code=404, detail="Avatar not found")
-    return FileResponse(avatar_path)
+    
+    digest = content_hash(filename)
+    if digest is None:
+        # Legacy avatar_<random> name: let the browser revalidate
+        return FileResponse(avatar_path, headers={"Cache-Control": "no-cache"})
+    
+    etag = f'"{digest}"'
+    headers = {"ETag": etag, "Cache-Control": "public, max-age=31536000, immutable"}
+    if etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return FileResponse(avatar_path, headers=headers)
 
 
 @app.post("/api/schedule")
-async def schedule_tasks():
+async def schedule_tasks(storage: Storage = Depends(get_storage)):
     """Schedule tasks using iFlow."""
     tasks = storage.get_tasks()
     # Only schedule pending tasks
@@ -170,7 +530,7 @@ async def schedule_tasks():
 
 
 @app.post("/api/tasks/{task_id}/execute")
-async def execute_task(task_id: str):
+async def execute_task(task_id: str, storage: Storage = Depends(get_storage)):
     """Execute a task using iFlow."""
     task = storage.get_task(task_id)
     if not task:
@@ -202,7 +562,7 @@ async def execute_task(task_id: str):
 
 
 @app.post("/api/tasks/{task_id}/execute/confirm")
-async def confirm_execute_task(task_id: str):
+async def confirm_execute_task(task_id: str, storage: Storage = Depends(get_storage)):
     """Execute a task after user confirmation."""
     task = storage.get_task(task_id)
     if not task:
@@ -222,7 +582,7 @@ async def confirm_execute_task(task_id: str):
 
 
 @app.post("/api/tasks/reorder")
-async def reorder_tasks(request: dict):
+async def reorder_tasks(request: dict, storage: Storage = Depends(get_storage)):
     """Reorder tasks based on new order."""
     task_order = request.get("task_order", [])
     
@@ -230,27 +590,7 @@ async def reorder_tasks(request: dict):
         return {"success": False, "message": "No task order provided"}
     
     try:
-        # Get all current tasks
-        all_tasks_data = storage._load_data()
-        all_tasks = all_tasks_data["tasks"]
-        
-        # Create a mapping of task ID to task data
-        task_map = {task["id"]: task for task in all_tasks}
-        
-        # Reorder tasks based on the provided order
-        reordered_tasks = []
-        for task_id in task_order:
-            if task_id in task_map:
-                reordered_tasks.append(task_map[task_id])
-        
-        # Add any tasks not in the order (just in case)
-        for task in all_tasks:
-            if task["id"] not in task_order:
-                reordered_tasks.append(task)
-        
-        # Save the reordered tasks
-        all_tasks_data["tasks"] = reordered_tasks
-        storage._save_data(all_tasks_data)
+        storage.reorder_tasks(task_order)
         
         return {"success": True}
     except Exception as e:
@@ -337,6 +677,9 @@ async def open_terminal(request: dict):
 @app.get("/api/canvas-assignments")
 async def get_canvas_assignments():
     """Fetch assignments from Canvas LMS."""
+    # Imported here as it is only needed for Canvas and is slow to import
+    import requests
+    
     try:
         # Load Canvas credentials from environment
         canvas_url = os.getenv('CANVAS_URL')
@@ -359,7 +702,8 @@ async def get_canvas_assignments():
         courses = []
         
         # Handle pagination for courses
-        response = requests.get(courses_url, headers=headers, params=params)
+        with CANVAS_LATENCY.time(endpoint="courses"):
+            response = requests.get(courses_url, headers=headers, params=params)
         response.raise_for_status()
         courses.extend(response.json())
         
@@ -373,7 +717,8 @@ async def get_canvas_assignments():
             params = {"include": ["submission"], "per_page": 100}
             
             # Handle pagination for assignments
-            response = requests.get(assignments_url, headers=headers, params=params)
+            with CANVAS_LATENCY.time(endpoint="assignments"):
+                response = requests.get(assignments_url, headers=headers, params=params)
             response.raise_for_status()
             assignments = response.json()
             
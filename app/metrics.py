@@ -0,0 +1,212 @@
+import cProfile
+import io
+import pstats
+import threading
+import time
+from contextlib import contextmanager
+from typing import Dict, List, Sequence, Tuple
+
+# Latency buckets in seconds, from sub-millisecond storage hits up to iFlow runs
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5,
+                   1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0)
+
+
+def _format_labels(labelnames: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(labelnames, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class _Metric:
+    kind = ""
+
+    def __init__(self, name: str, documentation: str, labelnames: Sequence[str] = ()):
+        self.name = name
+        self.documentation = documentation
+        self.labelnames = tuple(labelnames)
+        self._lock = threading.Lock()
+
+    def _key(self, labels: Dict[str, str]) -> Tuple[str, ...]:
+        return tuple(str(labels[name]) for name in self.labelnames)
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} {self.kind}"]
+        lines.extend(self._samples())
+        return lines
+
+    def _samples(self) -> List[str]:
+        raise NotImplementedError
+
+
+class Counter(_Metric):
+    kind = "counter"
+
+    def __init__(self, name, documentation, labelnames=()):
+        super().__init__(name, documentation, labelnames)
+        self._values: Dict[Tuple[str, ...], float] = {}
+
+    def inc(self, amount: float = 1.0, **labels):
+        key = self._key(labels)
+        with self._lock:
+            self._values[key] = self._values.get(key, 0.0) + amount
+
+    def value(self, **labels) -> float:
+        return self._values.get(self._key(labels), 0.0)
+
+    def _samples(self):
+        return [f"{self.name}{_format_labels(self.labelnames, key)} {value}"
+                for key, value in sorted(self._values.items())]
+
+
+class Gauge(Counter):
+    kind = "gauge"
+
+    def dec(self, amount: float = 1.0, **labels):
+        self.inc(-amount, **labels)
+
+    def set(self, value: float, **labels):
+        with self._lock:
+            self._values[self._key(labels)] = value
+
+    @contextmanager
+    def track_inprogress(self, **labels):
+        self.inc(**labels)
+        try:
+            yield
+        finally:
+            self.dec(**labels)
+
+
+class Histogram(_Metric):
+    kind = "histogram"
+
+    def __init__(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS):
+        super().__init__(name, documentation, labelnames)
+        self.buckets = tuple(sorted(buckets))
+        # Per label set: [count per bucket..., sum, count]
+        self._values: Dict[Tuple[str, ...], List[float]] = {}
+
+    def observe(self, value: float, **labels):
+        key = self._key(labels)
+        with self._lock:
+            series = self._values.get(key)
+            if series is None:
+                series = self._values[key] = [0] * len(self.buckets) + [0.0, 0]
+            for i, bound in enumerate(self.buckets):
+                if value <= bound:
+                    series[i] += 1
+                    break
+            series[-2] += value
+            series[-1] += 1
+
+    @contextmanager
+    def time(self, **labels):
+        """Observe the wall-clock duration of the with-block."""
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.observe(time.perf_counter() - start, **labels)
+
+    def count(self, **labels) -> int:
+        series = self._values.get(self._key(labels))
+        return series[-1] if series else 0
+
+    def _samples(self):
+        lines = []
+        for key, series in sorted(self._values.items()):
+            cumulative = 0
+            for bound, bucket_count in zip(self.buckets, series):
+                cumulative += bucket_count
+                labels = _format_labels(self.labelnames, key, f'le="{bound}"')
+                lines.append(f"{self.name}_bucket{labels} {cumulative}")
+            labels = _format_labels(self.labelnames, key, 'le="+Inf"')
+            lines.append(f"{self.name}_bucket{labels} {series[-1]}")
+            lines.append(f"{self.name}_sum{_format_labels(self.labelnames, key)} {series[-2]}")
+            lines.append(f"{self.name}_count{_format_labels(self.labelnames, key)} {series[-1]}")
+        return lines
+
+
+class Registry:
+    """Collection of metrics rendered together in Prometheus text format."""
+
+    def __init__(self):
+        self._metrics: Dict[str, _Metric] = {}
+
+    def _register(self, metric: _Metric) -> _Metric:
+        # Re-registering returns the existing metric so modules can be reloaded
+        return self._metrics.setdefault(metric.name, metric)
+
+    def counter(self, name, documentation, labelnames=()) -> Counter:
+        return self._register(Counter(name, documentation, labelnames))
+
+    def gauge(self, name, documentation, labelnames=()) -> Gauge:
+        return self._register(Gauge(name, documentation, labelnames))
+
+    def histogram(self, name, documentation, labelnames=(), buckets=DEFAULT_BUCKETS) -> Histogram:
+        return self._register(Histogram(name, documentation, labelnames, buckets))
+
+    def render(self) -> str:
+        lines = []
+        for metric in self._metrics.values():
+            lines.extend(metric.render())
+        return "\n".join(lines) + "\n"
+
+
+REGISTRY = Registry()
+
+# Metrics shared across modules
+HTTP_REQUESTS = REGISTRY.counter(
+    "open2do_http_requests_total", "HTTP requests by route, method and status code.",
+    ("method", "route", "status"))
+HTTP_LATENCY = REGISTRY.histogram(
+    "open2do_http_request_duration_seconds", "HTTP request latency by route and method.",
+    ("method", "route"))
+STORAGE_LATENCY = REGISTRY.histogram(
+    "open2do_storage_operation_duration_seconds", "Duration of storage operations.",
+    ("operation",))
+STORAGE_CACHE = REGISTRY.counter(
+    "open2do_storage_cache_total", "Task table lookups served from memory (hit) or disk (miss).",
+    ("result",))
+WORKSPACES_OPEN = REGISTRY.gauge(
+    "open2do_workspaces_open", "Workspaces whose storage is currently resident.")
+WORKSPACE_EVICTIONS = REGISTRY.counter(
+    "open2do_workspace_evictions_total", "Idle workspaces evicted from memory by the LRU.")
+VALIDATION_LATENCY = REGISTRY.histogram(
+    "open2do_task_validation_duration_seconds", "Time spent validating Task models on writes.")
+IFLOW_LATENCY = REGISTRY.histogram(
+    "open2do_iflow_run_duration_seconds", "iFlow CLI run duration by outcome.",
+    ("outcome",))
+IFLOW_IN_FLIGHT = REGISTRY.gauge(
+    "open2do_iflow_in_flight", "iFlow CLI processes currently running.")
+IFLOW_QUEUED = REGISTRY.gauge(
+    "open2do_iflow_queued", "iFlow CLI runs waiting for a free concurrency slot.")
+IFLOW_CPU = REGISTRY.histogram(
+    "open2do_iflow_cpu_seconds", "CPU time (user + system) used per iFlow CLI run.")
+IFLOW_FALLBACKS = REGISTRY.counter(
+    "open2do_iflow_fallbacks_total", "Operations that fell back to rule-based logic after an iFlow failure.",
+    ("operation",))
+NL_PARSE_TOTAL = REGISTRY.counter(
+    "open2do_nl_parse_total", "Natural-language autofill requests by the parser that answered (local or ai).",
+    ("parser",))
+NL_PARSE_LATENCY = REGISTRY.histogram(
+    "open2do_nl_parse_duration_seconds", "Natural-language autofill latency by the parser that answered.",
+    ("parser",))
+CANVAS_LATENCY = REGISTRY.histogram(
+    "open2do_canvas_request_duration_seconds", "Canvas LMS API request latency by endpoint.",
+    ("endpoint",))
+ERRORS = REGISTRY.counter(
+    "open2do_errors_total", "Handled errors by component.",
+    ("component",))
+
+
+def profile_report(profiler: cProfile.Profile, limit: int = 40) -> str:
+    """Text report of the most expensive calls, sorted by cumulative time."""
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
@@ -45,6 +45,7 @@ class TaskUpdate(BaseModel):
     priority: Optional[TaskPriority] = None
     status: Optional[TaskStatus] = None
     due_date: Optional[datetime] = None
+    ai_suggested_time: Optional[datetime] = None
     has_ai_button: Optional[bool] = None
 
 
@@ -0,0 +1,451 @@
+"""Deterministic parser for the natural-language autofill box.
+
+Handles the common, simple phrasings ("buy milk tomorrow high priority",
+"show completed work tasks", "sort by due date newest first") locally and
+reports how confident it is, so the slow iFlow-based parser is only needed
+for inputs it does not fully understand.
+"""
+import calendar
+import re
+from datetime import date, datetime, time, timedelta
+from typing import Iterable, Optional, Tuple
+
+# Due time used when an input names a day but no time of day
+DEFAULT_DUE_TIME = time(23, 59)
+
+WEEKDAYS = ("monday", "tuesday", "wednesday", "thursday", "friday", "saturday", "sunday")
+MONTHS = ("jan", "feb", "mar", "apr", "may", "jun", "jul", "aug", "sep", "oct", "nov", "dec")
+NUMBER_WORDS = {"a": 1, "an": 1, "one": 1, "two": 2, "three": 3, "four": 4, "five": 5,
+                "six": 6, "seven": 7, "eight": 8, "nine": 9, "ten": 10}
+
+_MONTH = (r"(jan(?:uary)?|feb(?:ruary)?|mar(?:ch)?|apr(?:il)?|may|june?|july?|aug(?:ust)?"
+          r"|sep(?:t|tember)?|oct(?:ober)?|nov(?:ember)?|dec(?:ember)?)\.?")
+_WEEKDAY = r"(monday|tuesday|tues|wednesday|thursday|thurs|friday|fri|saturday|sunday)"
+# Short weekday names that are also ordinary words ("sun cream", "sat down")
+_WEEKDAY_ABBR = r"(mon|tue|wed|thu|sat|sun)"
+# What may follow a short weekday name or an ordinal day for it to be taken as a date
+_DATE_END = r"(?=\s*(?:$|[,;]|(?:at\s+)?\d))"
+_COUNT = r"(\d+|" + "|".join(NUMBER_WORDS) + r")"
+
+# Day expressions, tried in order; each maps a match to a date
+_DAY_PATTERNS = (
+    # The date part of an ISO datetime swallows the "T" left behind by its time part
+    ("iso", re.compile(r"\b(\d{4})-(\d{1,2})-(\d{1,2})(?:t(?=\d|\s|$)|\b)")),
+    ("slash", re.compile(r"\b(\d{1,2})/(\d{1,2})(?:/(\d{2}|\d{4}))?\b")),
+    ("month_day", re.compile(r"\b" + _MONTH + r"\s+(\d{1,2})(?:st|nd|rd|th)?(?:,?\s+(\d{4}))?\b")),
+    ("day_month", re.compile(r"\b(\d{1,2})(?:st|nd|rd|th)?\s+(?:of\s+)?" + _MONTH + r"(?:,?\s+(\d{4}))?\b")),
+    ("day_after_tomorrow", re.compile(r"\bday after tomorrow\b")),
+    ("tomorrow", re.compile(r"\b(tomorrow|tmrw|tmr)\b")),
+    ("today", re.compile(r"\b(today|tonight)\b")),
+    ("yesterday", re.compile(r"\byesterday\b")),
+    ("in_count", re.compile(r"\bin\s+" + _COUNT + r"\s+(day|week|month)s?\b")),
+    ("weekday", re.compile(r"\b(?:(next|this|coming)\s+)?" + _WEEKDAY + r"\b")),
+    # Short names only after a date word ("due mon", "next sat") or at the end of the input
+    ("weekday", re.compile(r"\b(?:(next|this|coming|on|by|due)\s+)" + _WEEKDAY_ABBR + r"\b\.?")),
+    ("weekday", re.compile(r"\b()" + _WEEKDAY_ABBR + r"\b\.?" + _DATE_END)),
+    # "on the 1st"; a bare "the 2nd" is only a date at the end ("read the 2nd chapter" is not)
+    ("ordinal", re.compile(r"\b(?:on|by|due|before)\s+the\s+(\d{1,2})(?:st|nd|rd|th)\b")),
+    ("ordinal", re.compile(r"\bthe\s+(\d{1,2})(?:st|nd|rd|th)\b" + _DATE_END)),
+    ("end_of_week", re.compile(r"\b(?:end of (?:the )?week|this weekend|weekend)\b")),
+    ("end_of_month", re.compile(r"\bend of (?:the )?month\b")),
+    ("next_week", re.compile(r"\bnext week\b")),
+    ("next_month", re.compile(r"\bnext month\b")),
+)
+
+# Time-of-day expressions; each maps a match to a time
+_TIME_PATTERNS = (
+    ("clock", re.compile(r"\b(?:at\s+)?(\d{1,2})(?::(\d{2}))?\s*(am|pm|a\.m\.|p\.m\.)")),
+    ("clock24", re.compile(r"(?:\bat\s+)?(?<![\d:])(\d{1,2}):(\d{2})(?::\d{2})?\b")),
+    ("at_hour", re.compile(r"\bat\s+(\d{1,2})\b(?!\s*(?:/|-|st|nd|rd|th))(?:\s*o'?clock\b)?")),
+    # "by 5" is also arithmetic ("increase by 10"), so only before a day or at the end
+    ("at_hour", re.compile(r"\bby\s+(1[0-2]|[1-9])\b(?:\s*o'?clock\b)?"
+                           r"(?=\s*(?:$|[,;]|(?:\w*day|tonight|tomorrow|tmrw|on|this|next)\b))")),
+    ("noon", re.compile(r"\b(?:at\s+)?noon\b")),
+    ("midnight", re.compile(r"\b(?:at\s+)?midnight\b")),
+    ("part_of_day", re.compile(r"\b(?:in the\s+|this\s+)?(morning|afternoon|evening|tonight)\b")),
+)
+_PART_OF_DAY = {"morning": time(9), "afternoon": time(15), "evening": time(19), "tonight": time(20)}
+
+# "in 2 hours", "in an hour", "in 30 minutes": a due time relative to now
+_IN_DURATION = re.compile(r"\bin\s+" + _COUNT + r"\s+(hour|hr|minute|min)s?\b")
+
+_PRIORITY_PATTERNS = (
+    (re.compile(r"\b(?:with\s+)?(high|low|medium|normal)[- ]priority\b"), None),
+    (re.compile(r"\bpriority(?:\s+is|:)?\s+(high|low|medium|normal)\b"), None),
+    (re.compile(r"\b(urgent|urgently|asap|critical|important)\b|!{2,}"), "high"),
+    (re.compile(r"\b(whenever|someday|no rush)\b"), "low"),
+)
+
+_STATUS_PATTERNS = (
+    (re.compile(r"\bin[- ]progress\b|\bongoing\b|\bstarted\b"), "in_progress"),
+    (re.compile(r"\b(completed|complete|done|finished|closed)\b"), "completed"),
+    (re.compile(r"\b(pending|to[- ]?do|not started|open|unfinished|incomplete)\b"), "pending"),
+)
+
+_SORT_FIELDS = (
+    (re.compile(r"\bdue(?: date)?s?\b|\bdeadlines?\b"), "due_date"),
+    (re.compile(r"\bpriority\b|\bimportance\b"), "priority"),
+    (re.compile(r"\bcreat(?:ed|ion)(?: date| time)?\b|\bdate added\b|\bage\b"), "created_date"),
+    (re.compile(r"\bcustom\b|\bmanual(?:ly)?\b|\bmy order\b"), "custom"),
+)
+_SORT_ORDERS = (
+    (re.compile(r"\b(desc|descending|newest first|latest first|highest first|most recent first|reverse)\b"), "desc"),
+    (re.compile(r"\b(asc|ascending|oldest first|earliest first|soonest first|lowest first)\b"), "asc"),
+)
+
+_SORT_INTENT = re.compile(r"\b(sort|sorted|order|ordered|arrange|arranged)\s+(?:them\s+|tasks\s+|it\s+)?(by|on)\b|^\s*sort\b")
+_FILTER_INTENT = re.compile(r"^\s*(?:please\s+)?(show|list|find|filter|display|view|get|search|which|what)\b")
+_SEARCH = re.compile(r"\b(?:containing|mentioning|matching|about|named|called|search(?:ing)? for|with the word)\s+"
+                     r"[\"']?([^\"']+?)[\"']?\s*$")
+_QUOTED = re.compile(r"[\"“]([^\"”]+)[\"”]")
+_TASK_PREFIX = re.compile(
+    r"^\s*(?:please\s+)?(?:i\s+(?:need|have|want|would like|should|must)\s+to\s+|i\s+have\s+got\s+to\s+"
+    r"|remind me to\s+|don'?t forget to\s+|remember to\s+|todo:?\s+|(?:add|create|new)(?:\s+a)?(?:\s+new)?"
+    r"(?:\s+task)?(?:\s+to)?:?\s+)")
+_NEW_CATEGORY = re.compile(r"\b(?:in|under|for)?\s*(?:the\s+)?(?:category|cat)(?:\s+is|:)?\s+([A-Za-z][\w-]*)")
+
+# Words that only carry intent or glue, ignored when checking that a filter/sort input was fully understood
+_FILTER_NOISE = {
+    "show", "list", "find", "filter", "display", "view", "get", "search", "which", "what", "me", "my", "all",
+    "the", "a", "tasks", "task", "items", "todos", "that", "are", "is", "in", "for", "of", "category",
+    "status", "with", "only", "please", "and", "by", "on", "sort", "sorted", "order", "ordered", "arrange",
+    "arranged", "them", "it", "due", "created", "first", "then", "from", "to", "priority", "date",
+    "containing", "mentioning", "matching", "about", "named", "called", "word",
+}
+# Words suggesting meaning the local parser cannot represent (recurrence, conditions, relative ranges)
+_COMPLEX = re.compile(r"\b(every|each|daily|weekly|monthly|yearly|unless|except|if|when|until|between|ago|last|"
+                      r"before|after|since|or|not)\b|\?")
+_LEFTOVER_DATE = re.compile(r"\b(" + "|".join(WEEKDAYS) + r"|january|february|march|april|june|july|august"
+                            r"|september|october|november|december|next|this|week|month|year|tomorrow|today"
+                            r"|morning|evening|night|am|pm|o'?clock|hours?|hrs?|minutes?|mins?|days?|weeks?"
+                            r"|months?|weekend|tonight|noon|midnight)\b"
+                            r"|\b(?:on|by|the)\s+\d{1,2}(?:st|nd|rd|th)\b|\b(?:at|by)\s+\d")
+_TRAILING_GLUE = re.compile(r"(?:\s+(?:by|on|at|due|for|in|with|and|before|to|the|a|is|it|of|under|category))+\s*$")
+
+
+class _Text:
+    """Lower-cased input with the spans consumed by extractors blanked out."""
+
+    def __init__(self, text: str):
+        self.rest = text.lower()
+        # Lower-casing can change the length of some non-ASCII text; offsets must line up
+        self.original = text if len(text) == len(self.rest) else self.rest
+        # Set when something date-like could not be turned into a valid date or time
+        self.unsure = False
+
+    def take(self, pattern: re.Pattern) -> Optional[re.Match]:
+        match = pattern.search(self.rest)
+        if match:
+            # Blank rather than delete, so later matches keep the original offsets
+            self.rest = self.rest[:match.start()] + " " * (match.end() - match.start()) + self.rest[match.end():]
+        return match
+
+    def words(self):
+        return re.findall(r"[a-z0-9']+", self.rest)
+
+    def remaining_original(self) -> str:
+        """The not-yet-consumed parts of the input, with their original casing."""
+        return "".join(c if r != " " or c.isspace() else " " for c, r in zip(self.original, self.rest))
+
+
+def _month(name: str) -> int:
+    return MONTHS.index(name[:3]) + 1
+
+
+def _future_date(month: int, day: int, year: Optional[str], today: date) -> date:
+    """Date for a day and month; without a year, the next occurrence from today."""
+    if year:
+        year = int(year)
+        return date(year + 2000 if year < 100 else year, month, day)
+    result = date(today.year, month, day)
+    return result if result >= today else date(today.year + 1, month, day)
+
+
+def _day_from_match(kind: str, match: re.Match, today: date) -> date:  # pylint: disable=too-many-return-statements,too-many-branches
+    groups = match.groups()
+    if kind == "iso":
+        return date(int(groups[0]), int(groups[1]), int(groups[2]))
+    if kind == "slash":
+        return _future_date(int(groups[0]), int(groups[1]), groups[2], today)
+    if kind == "month_day":
+        return _future_date(_month(groups[0]), int(groups[1]), groups[2], today)
+    if kind == "day_month":
+        return _future_date(_month(groups[1]), int(groups[0]), groups[2], today)
+    if kind == "in_count":
+        count = int(groups[0]) if groups[0].isdigit() else NUMBER_WORDS[groups[0]]
+        if groups[1] == "month":
+            return _add_months(today, count)
+        return today + timedelta(days=count * (7 if groups[1] == "week" else 1))
+    if kind == "ordinal":
+        day = int(groups[0])
+        if day >= today.day:
+            return today.replace(day=day)
+        return _add_months(today.replace(day=1), 1).replace(day=day)
+    if kind == "weekday":
+        target = [day[:3] for day in WEEKDAYS].index(groups[1][:3])
+        days_ahead = (target - today.weekday()) % 7
+        if groups[0] == "next" and days_ahead == 0:
+            days_ahead = 7
+        return today + timedelta(days=days_ahead)
+    if kind == "end_of_week":
+        return today + timedelta(days=(5 - today.weekday()) % 7 if "weekend" in match.group(0)
+                                 else (4 - today.weekday()) % 7)
+    if kind == "end_of_month":
+        return date(today.year, today.month, calendar.monthrange(today.year, today.month)[1])
+    if kind == "next_week":
+        return today + timedelta(days=7 - today.weekday())
+    if kind == "next_month":
+        return _add_months(today, 1).replace(day=1)
+    offsets = {"day_after_tomorrow": 2, "tomorrow": 1, "today": 0, "yesterday": -1}
+    return today + timedelta(days=offsets[kind])
+
+
+def _add_months(day: date, months: int) -> date:
+    month_index = day.month - 1 + months
+    year, month = day.year + month_index // 12, month_index % 12 + 1
+    return date(year, month, min(day.day, calendar.monthrange(year, month)[1]))
+
+
+def _take_day(text: _Text, today: date) -> Optional[date]:
+    for kind, pattern in _DAY_PATTERNS:
+        match = text.take(pattern)
+        if match:
+            try:
+                return _day_from_match(kind, match, today)
+            except ValueError:
+                # Impossible date such as 2/30; leave it to the AI parser
+                text.unsure = True
+                return None
+    return None
+
+
+def _take_time(text: _Text) -> Optional[time]:
+    for kind, pattern in _TIME_PATTERNS:
+        match = text.take(pattern)
+        if not match:
+            continue
+        if kind == "noon":
+            return time(12)
+        if kind == "midnight":
+            return time(0)
+        if kind == "part_of_day":
+            return _PART_OF_DAY[match.group(1)]
+        groups = match.groups()
+        hour, minute = int(groups[0]), int(groups[1] or 0) if len(groups) > 1 else 0
+        if (kind == "at_hour" or (kind == "clock24" and not groups[0].startswith("0"))) and 1 <= hour <= 7:
+            # "at 5" or "3:30" means the afternoon far more often than the early morning
+            hour += 12
+        if kind == "clock":
+            if match.group(3).startswith("p") and hour < 12:
+                hour += 12
+            elif match.group(3).startswith("a") and hour == 12:
+                hour = 0
+        if hour > 23 or minute > 59:
+            text.unsure = True
+            return None
+        return time(hour, minute)
+    return None
+
+
+def _take_duration(text: _Text, now: datetime) -> Optional[datetime]:
+    match = text.take(_IN_DURATION)
+    if not match:
+        return None
+    count = int(match.group(1)) if match.group(1).isdigit() else NUMBER_WORDS[match.group(1)]
+    unit = timedelta(hours=1) if match.group(2).startswith("h") else timedelta(minutes=1)
+    return (now + count * unit).replace(second=0, microsecond=0)
+
+
+def _take_priority(text: _Text) -> Optional[str]:
+    for pattern, value in _PRIORITY_PATTERNS:
+        match = text.take(pattern)
+        if match:
+            value = value or match.group(1)
+            return "medium" if value == "normal" else value
+    return None
+
+
+def _take_status(text: _Text) -> Optional[str]:
+    for pattern, value in _STATUS_PATTERNS:
+        if text.take(pattern):
+            return value
+    return None
+
+
+def _take_category(text: _Text, categories: Iterable[str], explicit: bool = False) -> Optional[str]:
+    """A known category named in the input (longest name wins), with its preposition.
+
+    With explicit set (new tasks, whose titles often start with or contain a
+    category name: "work on slides", "home improvement ideas"), the name only
+    counts as a "#work" tag, a leading "Work:" or "[Work]" label, after "in"
+    or "category", or followed by "category" or "list".
+    """
+    for name in sorted(categories, key=len, reverse=True):
+        escaped = re.escape(name.lower())
+        if explicit:
+            pattern = re.compile(r"^\s*[\[(]" + escaped + r"[\])]:?|^\s*" + escaped + r"\s*:"
+                                 r"|#" + escaped + r"(?!\w)"
+                                 r"|(?:\b(?:in|category)\s+(?:the\s+|my\s+)?)" + escaped + r"(?!\w)"
+                                 r"(?:\s+(?:category|list))?"
+                                 r"|(?:\b(?:the|my)\s+)?(?<!\w)" + escaped + r"\s+(?:category|list)\b")
+        else:
+            pattern = re.compile(r"(?:\b(?:in|under|for)\s+(?:the\s+|my\s+)?)?[#(]?(?<!\w)" + escaped
+                                 + r"(?!\w)\)?(?:\s+(?:category|list|tasks?))?")
+        if text.take(pattern):
+            return name
+    return None
+
+
+def _take_range(text: _Text, today: date, keyword: str) -> Tuple[Optional[date], Optional[date]]:
+    """Date range after 'due' or 'created', e.g. 'due this week', 'created today', 'due by friday'."""
+    match = text.take(re.compile(r"\b" + keyword + r"\s+(this|next|last)\s+(week|month)\b"))
+    if match:
+        which, unit = match.groups()
+        if unit == "week":
+            start = today - timedelta(days=today.weekday()) + timedelta(weeks={"this": 0, "next": 1, "last": -1}[which])
+            return start, start + timedelta(days=6)
+        start = _add_months(today.replace(day=1), {"this": 0, "next": 1, "last": -1}[which])
+        return start, start.replace(day=calendar.monthrange(start.year, start.month)[1])
+
+    match = text.take(re.compile(r"\b" + keyword + r"(?:\s+(before|by|after|since|on))?\b"))
+    if not match:
+        return None, None
+    day = _take_day(text, today)
+    if day is None:
+        # 'due' on its own (e.g. 'sort by due date') is not a range; give it back
+        text.rest = text.rest[:match.start()] + match.group(0) + text.rest[match.end():]
+        return None, None
+    if match.group(1) in ("before", "by"):
+        return None, day
+    if match.group(1) in ("after", "since"):
+        return day, None
+    return day, day
+
+
+def _leftover_words(text: _Text):
+    return [word for word in text.words() if word not in _FILTER_NOISE]
+
+
+def _parse_sort(text: _Text) -> dict:
+    sort = {}
+    for pattern, value in _SORT_FIELDS:
+        if text.take(pattern):
+            sort["by"] = value
+            break
+    for pattern, value in _SORT_ORDERS:
+        if text.take(pattern):
+            sort["order"] = value
+            break
+    return sort
+
+
+def _parse_filter(text: _Text, categories: Iterable[str], today: date) -> dict:
+    filters = {}
+    quoted = text.take(_QUOTED)
+    search = quoted or text.take(_SEARCH)
+    if search:
+        # Use the original casing of the search term
+        filters["search"] = text.original[search.start(1):search.end(1)].strip()
+    for keyword, prefix in (("due", "due"), ("created", "created")):
+        start, end = _take_range(text, today, keyword)
+        if start:
+            filters[f"{prefix}_from"] = start.isoformat()
+        if end:
+            filters[f"{prefix}_to"] = end.isoformat()
+    status = _take_status(text)
+    if status:
+        filters["status"] = status
+    priority = _take_priority(text)
+    if priority:
+        filters["priority"] = priority
+    category = _take_category(text, categories)
+    if category:
+        filters["category"] = category
+    return filters
+
+
+def _parse_new_task(text: _Text, categories: Iterable[str], now: datetime) -> dict:
+    task = {}
+    text.take(_TASK_PREFIX)
+    priority = _take_priority(text)
+    if priority:
+        task["priority"] = priority
+    category = _take_category(text, categories, explicit=True)
+    if category is None:
+        match = text.take(_NEW_CATEGORY)
+        if match:
+            category = text.original[match.start(1):match.end(1)]
+    if category:
+        task["category"] = category
+
+    due = _take_duration(text, now)
+    if due is None:
+        due_time = _take_time(text)
+        due_day = _take_day(text, now.date())
+        if due_day is None and due_time is not None:
+            # A bare time means the next time the clock shows it
+            due_day = now.date() if due_time > now.time() else now.date() + timedelta(days=1)
+        if due_day is not None:
+            due = datetime.combine(due_day, due_time or DEFAULT_DUE_TIME)
+    if due is not None:
+        task["due_date"] = due.isoformat()
+        text.take(re.compile(r"\b(due|by|on|before)\b(?=\s*$)"))
+
+    title = re.sub(r"\s+", " ", text.remaining_original()).strip(" ,.;:-!")
+    title = _TRAILING_GLUE.sub("", title).strip(" ,.;:-!")
+    title = re.sub(r"^(?:to|and)\s+", "", title, flags=re.IGNORECASE)
+    if title:
+        task["title"] = title[0].upper() + title[1:]
+    if task:
+        task["description"] = text.original.strip()
+    return task
+
+
+def _task_confidence(task: dict, text: _Text) -> float:
+    title = task.get("title", "")
+    if not title or text.unsure:
+        return 0.0
+    confidence = 1.0
+    lowered = title.lower()
+    if len(title.split()) > 6:
+        # Long free-form sentences need summarising into a short title
+        confidence -= 0.4
+    if _COMPLEX.search(lowered):
+        confidence -= 0.5
+    if _LEFTOVER_DATE.search(lowered):
+        # Probably a date or time phrase the patterns above did not recognise
+        confidence -= 0.5
+    elif re.search(r"\d", lowered):
+        # Numbers are often just part of the title ("call 3 clients"), but may be an odd date
+        confidence -= 0.2
+    return max(confidence, 0.0)
+
+
+def parse(text: str, categories: Iterable[str] = (), now: Optional[datetime] = None) -> Tuple[dict, float]:
+    """Parse autofill input into the new_task/filter/sort structure.
+
+    Returns the parsed data and a confidence between 0 and 1. Only inputs
+    that were understood completely score high; anything with leftover
+    words, recurrence, conditions or unrecognised dates scores low so the
+    caller can fall back to the AI parser.
+    """
+    now = now or datetime.now()
+    categories = list(categories)
+    result = {"new_task": {}, "filter": {}, "sort": {}}
+    parsed = _Text(text)
+
+    sort_intent = parsed.take(_SORT_INTENT)
+    filter_intent = _FILTER_INTENT.search(parsed.rest)
+    if sort_intent or filter_intent:
+        if sort_intent:
+            result["sort"] = _parse_sort(parsed)
+        result["filter"] = _parse_filter(parsed, categories, now.date())
+        leftover = _leftover_words(parsed)
+        if (sort_intent and not result["sort"]) or not (result["sort"] or result["filter"]):
+            return result, 0.0
+        if _COMPLEX.search(parsed.rest) or parsed.unsure:
+            return result, 0.3
+        return result, 1.0 if not leftover else 0.4
+
+    result["new_task"] = _parse_new_task(parsed, categories, now)
+    return result, _task_confidence(result["new_task"], parsed)
@@ -0,0 +1,204 @@
+import sys
+from datetime import datetime, timedelta, timezone
+from typing import Dict, List, Optional
+
+from app.indexes import DueDateIndex
+from app.models import Task, TaskPriority, TaskStatus
+
+STATUSES = tuple(TaskStatus)
+PRIORITIES = tuple(TaskPriority)
+STATUS_CODES = {status.value: code for code, status in enumerate(STATUSES)}
+PRIORITY_CODES = {priority.value: code for code, priority in enumerate(PRIORITIES)}
+
+# Datetime fields, in the order their UTC offsets are kept in TaskRecord.tz_offsets
+DATETIME_FIELDS = ("due_date", "created_at", "ai_suggested_time")
+
+# Naive datetimes are packed as seconds since this (naive) epoch, i.e. as if they were UTC
+_NAIVE_EPOCH = datetime(1970, 1, 1)
+
+# Fields of a task's dict form, in output order (see TaskRecord.to_dict and TaskRecord.project)
+TASK_FIELDS = ("id", "title", "description", "category", "priority", "status", "due_date",
+               "created_at", "folder_path", "ai_suggested_time", "has_ai_button")
+
+
+def _pack_datetime(value):
+    """Convert a datetime (or ISO string) to (timestamp, UTC offset seconds or None).
+
+    Aware datetimes become POSIX timestamps. Naive ones are encoded as if
+    they were UTC (offset None marks them as naive), so they round-trip
+    exactly, even wall times that do not exist or are ambiguous locally.
+    """
+    if value is None:
+        return None, None
+    if isinstance(value, str):
+        value = datetime.fromisoformat(value)
+    offset = value.utcoffset()
+    if offset is None:
+        return (value - _NAIVE_EPOCH).total_seconds(), None
+    return value.timestamp(), int(offset.total_seconds())
+
+
+def _unpack_datetime(timestamp: Optional[float], offset: Optional[int]) -> Optional[datetime]:
+    """Inverse of _pack_datetime."""
+    if timestamp is None:
+        return None
+    if offset is None:
+        return _NAIVE_EPOCH + timedelta(seconds=timestamp)
+    return datetime.fromtimestamp(timestamp, timezone(timedelta(seconds=offset)))
+
+
+def _local_timestamp(timestamp: Optional[float], offset: Optional[int]) -> Optional[float]:
+    """POSIX timestamp of a packed datetime, reading naive values as local time."""
+    if timestamp is None or offset is not None:
+        return timestamp
+    return (_NAIVE_EPOCH + timedelta(seconds=timestamp)).timestamp()
+
+
+class TaskRecord:  # pylint: disable=too-many-instance-attributes
+    """Compact in-memory form of a stored task.
+
+    Status and priority are kept as small integer codes, datetimes as
+    timestamps (see _pack_datetime; use timestamp() to compare them with the
+    current time) and categories as interned strings. Records are converted to
+    Task models or JSON dicts only at the API boundary.
+    """
+    __slots__ = ("id", "title", "description", "category", "priority", "status",
+                 "due_date", "created_at", "ai_suggested_time", "folder_path",
+                 "has_ai_button", "tz_offsets")
+
+    def __init__(self, data: dict):
+        """Build a record from a task dict (JSON form or model_dump output)."""
+        self.id = data["id"]
+        self.title = data["title"]
+        self.description = data.get("description")
+        self.category = sys.intern(data["category"])
+        self.priority = PRIORITY_CODES[data.get("priority") or TaskPriority.medium.value]
+        self.status = STATUS_CODES[data.get("status") or TaskStatus.pending.value]
+        self.folder_path = data["folder_path"]
+        self.has_ai_button = bool(data.get("has_ai_button", False))
+
+        self.due_date, due_offset = _pack_datetime(data.get("due_date"))
+        self.created_at, created_offset = _pack_datetime(data.get("created_at") or datetime.now())
+        self.ai_suggested_time, suggested_offset = _pack_datetime(data.get("ai_suggested_time"))
+        # Most stored datetimes are naive, so only timezone-aware records pay for offsets
+        offsets = (due_offset, created_offset, suggested_offset)
+        self.tz_offsets = offsets if any(o is not None for o in offsets) else None
+
+    @classmethod
+    def from_task(cls, task: Task) -> "TaskRecord":
+        return cls(task.model_dump())
+
+    def get_datetime(self, field: str) -> Optional[datetime]:
+        offset = self.tz_offsets[DATETIME_FIELDS.index(field)] if self.tz_offsets else None
+        return _unpack_datetime(getattr(self, field), offset)
+
+    def timestamp(self, field: str) -> Optional[float]:
+        """POSIX timestamp of a datetime field, with naive values in local time."""
+        offset = self.tz_offsets[DATETIME_FIELDS.index(field)] if self.tz_offsets else None
+        return _local_timestamp(getattr(self, field), offset)
+
+    def to_dict(self) -> dict:
+        """Plain dict for storage and API responses.
+
+        Datetimes are left as datetime objects; both storage codecs and
+        serialization.dumps_json encode them as ISO 8601 strings.
+        """
+        if self.tz_offsets:
+            due_date, created_at, ai_suggested_time = (
+                _unpack_datetime(getattr(self, field), offset)
+                for field, offset in zip(DATETIME_FIELDS, self.tz_offsets)
+            )
+        else:
+            due_date = _unpack_datetime(self.due_date, None)
+            created_at = _unpack_datetime(self.created_at, None)
+            ai_suggested_time = _unpack_datetime(self.ai_suggested_time, None)
+        return {
+            "id": self.id,
+            "title": self.title,
+            "description": self.description,
+            "category": self.category,
+            "priority": PRIORITIES[self.priority].value,
+            "status": STATUSES[self.status].value,
+            "due_date": due_date,
+            "created_at": created_at,
+            "folder_path": self.folder_path,
+            "ai_suggested_time": ai_suggested_time,
+            "has_ai_button": self.has_ai_button,
+        }
+
+    def project(self, fields) -> dict:
+        """Dict with only the given fields (names from TASK_FIELDS), for slim API responses.
+
+        Only the requested fields are converted, so lists that need a few
+        columns skip most of the work of to_dict().
+        """
+        result = {}
+        for field in fields:
+            if field == "priority":
+                result[field] = PRIORITIES[self.priority].value
+            elif field == "status":
+                result[field] = STATUSES[self.status].value
+            elif field in DATETIME_FIELDS:
+                result[field] = self.get_datetime(field)
+            else:
+                result[field] = getattr(self, field)
+        return result
+
+    def to_task(self) -> Task:
+        """Task model for this record; fields are already valid, so validation is skipped."""
+        return Task.model_construct(
+            id=self.id,
+            title=self.title,
+            description=self.description,
+            category=self.category,
+            priority=PRIORITIES[self.priority],
+            status=STATUSES[self.status],
+            due_date=self.get_datetime("due_date"),
+            created_at=self.get_datetime("created_at"),
+            folder_path=self.folder_path,
+            ai_suggested_time=self.get_datetime("ai_suggested_time"),
+            has_ai_button=self.has_ai_button,
+        )
+
+
+class TaskTable:
+    """Resident task records in display order, plus ID and due-date indexes and the category list."""
+
+    def __init__(self, data: dict):
+        self.records: List[TaskRecord] = [TaskRecord(task) for task in data.get("tasks", [])]
+        self.index: Dict[str, TaskRecord] = {record.id: record for record in self.records}
+        # Keyed by local POSIX time, so ranges can be compared with the current time
+        self.due_index = DueDateIndex(
+            (record.timestamp("due_date"), record.id) for record in self.records if record.due_date is not None
+        )
+        self.categories: List[dict] = data.get("categories", [])
+
+    def append(self, record: TaskRecord):
+        self.records.append(record)
+        self.index[record.id] = record
+        self.due_index.add(record.timestamp("due_date"), record.id)
+
+    def replace(self, record: TaskRecord):
+        old = self.index[record.id]
+        self.records[self.records.index(old)] = record
+        self.index[record.id] = record
+        if old.due_date != record.due_date or old.tz_offsets != record.tz_offsets:
+            self.due_index.remove(old.timestamp("due_date"), old.id)
+            self.due_index.add(record.timestamp("due_date"), record.id)
+
+    def remove(self, task_id: str) -> Optional[TaskRecord]:
+        record = self.index.pop(task_id, None)
+        if record is not None:
+            self.records.remove(record)
+            self.due_index.remove(record.timestamp("due_date"), record.id)
+        return record
+
+    def due_between(self, start: Optional[float] = None, end: Optional[float] = None) -> List[TaskRecord]:
+        """Records due in [start, end] (POSIX timestamps), earliest first."""
+        return [self.index[task_id] for task_id in self.due_index.range(start, end)]
+
+    def to_dict(self) -> dict:
+        return {
+            "tasks": [record.to_dict() for record in self.records],
+            "categories": self.categories,
+        }
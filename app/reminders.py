@@ -0,0 +1,172 @@
+import asyncio
+import heapq
+import itertools
+import threading
+import time
+from datetime import datetime
+from typing import Dict, List, Optional, Tuple
+
+from app.records import STATUS_CODES, TaskRecord, TaskTable
+from app.models import TaskStatus
+from app.workspaces import DEFAULT_WORKSPACE
+
+# Longest the engine sleeps before re-checking the clock, so wall-clock
+# changes (suspend/resume, NTP jumps) delay reminders by at most this much.
+MAX_SLEEP_SECONDS = 60.0
+
+REMINDER_KINDS = {
+    "due": "due_date",
+    "suggested": "ai_suggested_time",
+}
+
+
+class ReminderEngine:  # pylint: disable=too-many-instance-attributes
+    """Fires reminder events at task due dates and AI-suggested times.
+
+    Pending timers live in a min-heap keyed by fire time. Changing or
+    deleting a task invalidates its old heap entry lazily (by sequence
+    number), so the engine never scans the task list after the initial
+    load: each wake-up only pops the timers that are actually due.
+
+    Timers are keyed by workspace as well as task, so one engine serves
+    every workspace and keeps firing for workspaces whose storage has been
+    evicted from memory.
+    """
+
+    def __init__(self, max_queue_size: int = 100):
+        self._heap: List[Tuple[float, int, str, str, str, str]] = []
+        self._pending: Dict[Tuple[str, str, str], int] = {}
+        self._sequence = itertools.count()
+        self._wakeup: Optional[asyncio.Event] = None
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        # Timers may be (re)armed from a storage warm-up thread as well as the event loop
+        self._lock = threading.Lock()
+        # Subscriber queue -> workspace whose events it receives
+        self._subscribers: Dict[asyncio.Queue, str] = {}
+        self._max_queue_size = max_queue_size
+
+    def __len__(self) -> int:
+        return len(self._pending)
+
+    def schedule(self, task_id: str, kind: str, fire_at: float, title: str, *,
+                 workspace: str = DEFAULT_WORKSPACE):
+        """Arm (or re-arm) the timer of the given kind for a task."""
+        with self._lock:
+            seq = next(self._sequence)
+            self._pending[(workspace, task_id, kind)] = seq
+            heapq.heappush(self._heap, (fire_at, seq, workspace, task_id, kind, title))
+            earliest = self._heap[0][1] == seq
+        if earliest and self._loop is not None:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    def cancel(self, task_id: str, kind: str, workspace: str = DEFAULT_WORKSPACE):
+        """Disarm a timer; its heap entry is discarded when it surfaces."""
+        with self._lock:
+            if self._pending.pop((workspace, task_id, kind), None) is not None:
+                self._compact()
+
+    def task_changed(self, old: Optional[TaskRecord], new: Optional[TaskRecord],
+                     workspace: str = DEFAULT_WORKSPACE):
+        """Storage listener hook: keep timers in step with a created, updated or deleted task."""
+        if new is None:
+            for kind in REMINDER_KINDS:
+                self.cancel(old.id, kind, workspace)
+            return
+        now = time.time()
+        completed = new.status == STATUS_CODES[TaskStatus.completed]
+        for kind, field in REMINDER_KINDS.items():
+            fire_at = new.timestamp(field)
+            if completed or fire_at is None or fire_at <= now:
+                self.cancel(new.id, kind, workspace)
+            elif (old is None or old.timestamp(field) != fire_at or old.title != new.title
+                  or (workspace, new.id, kind) not in self._pending):
+                self.schedule(new.id, kind, fire_at, new.title, workspace=workspace)
+
+    def tasks_loaded(self, table: TaskTable, workspace: str = DEFAULT_WORKSPACE):
+        """Storage listener hook: rebuild a workspace's timers from a freshly loaded table."""
+        with self._lock:
+            for key in [key for key in self._pending if key[0] == workspace]:
+                del self._pending[key]
+            self._compact()
+        for record in table.records:
+            self.task_changed(None, record, workspace)
+
+    def workspace_opened(self, workspace: str, storage):
+        """Workspace registry hook: follow the changes made through a workspace's storage."""
+        if workspace == DEFAULT_WORKSPACE:
+            storage.add_listener(self)
+        else:
+            storage.add_listener(WorkspaceReminders(self, workspace))
+
+    def _compact(self):
+        """Rebuild the heap once stale entries outnumber live ones."""
+        if len(self._heap) > 2 * len(self._pending) + 64:
+            self._heap = [entry for entry in self._heap
+                          if self._pending.get((entry[2], entry[3], entry[4])) == entry[1]]
+            heapq.heapify(self._heap)
+
+    def _pop_due(self, now: float) -> List[dict]:
+        events = []
+        with self._lock:
+            while self._heap and self._heap[0][0] <= now:
+                fire_at, seq, workspace, task_id, kind, title = heapq.heappop(self._heap)
+                if self._pending.get((workspace, task_id, kind)) != seq:
+                    continue
+                del self._pending[(workspace, task_id, kind)]
+                events.append({
+                    "type": kind,
+                    "workspace": workspace,
+                    "task_id": task_id,
+                    "title": title,
+                    "at": datetime.fromtimestamp(fire_at).isoformat(),
+                })
+        return events
+
+    def subscribe(self, workspace: str = DEFAULT_WORKSPACE) -> asyncio.Queue:
+        """Register a client; the workspace's fired events are put on the returned queue."""
+        queue = asyncio.Queue(maxsize=self._max_queue_size)
+        self._subscribers[queue] = workspace
+        return queue
+
+    def unsubscribe(self, queue: asyncio.Queue):
+        self._subscribers.pop(queue, None)
+
+    def _publish(self, event: dict):
+        for queue, workspace in self._subscribers.items():
+            if workspace != event["workspace"]:
+                continue
+            if queue.full():
+                # Slow client: drop its oldest event rather than block the engine
+                queue.get_nowait()
+            queue.put_nowait(event)
+
+    async def run(self):
+        """Background loop: sleep until the next timer (or a re-arm) and publish due events."""
+        self._wakeup = asyncio.Event()
+        self._loop = asyncio.get_running_loop()
+        while True:
+            for event in self._pop_due(time.time()):
+                self._publish(event)
+            timeout = MAX_SLEEP_SECONDS
+            with self._lock:
+                if self._heap:
+                    timeout = min(max(self._heap[0][0] - time.time(), 0.0), MAX_SLEEP_SECONDS)
+            self._wakeup.clear()
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=timeout)
+            except asyncio.TimeoutError:
+                pass
+
+
+class WorkspaceReminders:
+    """Storage listener that forwards a non-default workspace's changes to the engine."""
+
+    def __init__(self, engine: ReminderEngine, workspace: str):
+        self.engine = engine
+        self.workspace = workspace
+
+    def task_changed(self, old: Optional[TaskRecord], new: Optional[TaskRecord]):
+        self.engine.task_changed(old, new, self.workspace)
+
+    def tasks_loaded(self, table: TaskTable):
+        self.engine.tasks_loaded(table, self.workspace)
@@ -0,0 +1,106 @@
+from datetime import date, timedelta
+from typing import Dict, List, Optional
+
+from app.models import TaskStatus
+
+# Counters kept per day and category, in the order they are stored
+ROLLUP_COUNTERS = ("created", "completed", "deleted")
+BUCKETS = ("day", "week", "month")
+
+# Category label for events whose task category is unknown
+UNKNOWN_CATEGORY = ""
+
+_COMPLETED = TaskStatus.completed.value
+
+
+def bucket_start(day: date, bucket: str) -> date:
+    """First day of the day/week (Monday)/month bucket containing day."""
+    if bucket == "week":
+        return day - timedelta(days=day.weekday())
+    if bucket == "month":
+        return day.replace(day=1)
+    return day
+
+
+def _next_bucket(start: date, bucket: str) -> date:
+    if bucket == "week":
+        return start + timedelta(weeks=1)
+    if bucket == "month":
+        return (start.replace(day=28) + timedelta(days=4)).replace(day=1)
+    return start + timedelta(days=1)
+
+
+class Rollups:
+    """Per-day, per-category counts of created, completed and deleted tasks.
+
+    Fed one history event at a time (see TaskHistory), so the aggregates
+    stay current without rescanning tasks or history. "completed" counts
+    changes to the completed status, including tasks created or imported
+    as completed (but not tasks that were already completed when the
+    history log was started, as their completion time is unknown); a task that is reopened and completed again counts once
+    per completion. Queries cost time
+    proportional to the number of days in the range, not the number of
+    tasks.
+    """
+
+    def __init__(self):
+        self._days: Dict[date, Dict[str, List[int]]] = {}
+        # Current category of each live task, for events that do not repeat it
+        self._task_categories: Dict[str, str] = {}
+
+    def _count(self, day: date, category: Optional[str], counter: int):
+        per_category = self._days.setdefault(day, {})
+        counts = per_category.get(category or UNKNOWN_CATEGORY)
+        if counts is None:
+            counts = per_category[category or UNKNOWN_CATEGORY] = [0] * len(ROLLUP_COUNTERS)
+        counts[counter] += 1
+
+    def add(self, event: dict):
+        """Account for one history event."""
+        day = date.fromtimestamp(event["t"])
+        task_id = event["id"]
+        fields = event.get("f", {})
+        if event["op"] == "c":
+            self._task_categories[task_id] = fields.get("category")
+            self._count(day, fields.get("category"), 0)
+            if fields.get("status") == _COMPLETED and not event.get("seed"):
+                # Created (e.g. imported) already completed. Seed events are dated at
+                # creation, with no record of the completion time, so they are skipped.
+                self._count(day, fields.get("category"), 1)
+        elif event["op"] == "u":
+            if "category" in fields:
+                self._task_categories[task_id] = fields["category"]
+            if fields.get("status") == _COMPLETED:
+                self._count(day, self._task_categories.get(task_id), 1)
+        else:
+            self._count(day, self._task_categories.pop(task_id, None), 2)
+
+    def series(self, start: date, end: date, bucket: str = "day", *, category: Optional[str] = None,
+               by_category: bool = False) -> List[dict]:
+        """Counts per bucket from start to end inclusive, optionally for one category or split by category."""
+        buckets = []
+        current = bucket_start(start, bucket)
+        while current <= end:
+            following = _next_bucket(current, bucket)
+            totals = [0] * len(ROLLUP_COUNTERS)
+            categories: Dict[str, List[int]] = {}
+            day = max(current, start)
+            while day < following and day <= end:
+                for name, counts in self._days.get(day, {}).items():
+                    if category is not None and name != category:
+                        continue
+                    for i, count in enumerate(counts):
+                        totals[i] += count
+                    if by_category:
+                        merged = categories.setdefault(name, [0] * len(ROLLUP_COUNTERS))
+                        for i, count in enumerate(counts):
+                            merged[i] += count
+                day += timedelta(days=1)
+
+            entry = {"start": current.isoformat(), **dict(zip(ROLLUP_COUNTERS, totals))}
+            if by_category:
+                entry["categories"] = {name: dict(zip(ROLLUP_COUNTERS, counts))
+                                       for name, counts in sorted(categories.items())}
+            buckets.append(entry)
+            current = following
+        return buckets
@@ -0,0 +1,148 @@
+import json
+import os
+import sys
+from datetime import date, datetime
+from pathlib import Path
+from typing import Optional
+
+try:
+    import orjson
+except ImportError:  # pragma: no cover - optional speedup
+    orjson = None
+
+try:
+    import msgpack
+except ImportError:  # pragma: no cover - optional binary format
+    msgpack = None
+
+
+def _default(value):
+    """Fallback encoder for values the codecs do not handle natively."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return str(value)
+
+
+class Codec:
+    """Base class for on-disk formats of the task store."""
+    name = ""
+
+    def dumps(self, data) -> bytes:
+        raise NotImplementedError
+
+    def loads(self, raw: bytes):
+        raise NotImplementedError
+
+
+class JsonCodec(Codec):
+    """Human-readable, indented JSON (the original tasks.json layout)."""
+    name = "json"
+
+    def dumps(self, data) -> bytes:
+        return json.dumps(data, indent=2, default=_default).encode("utf-8")
+
+    def loads(self, raw: bytes):
+        if orjson is not None:
+            return orjson.loads(raw)  # pylint: disable=no-member
+        return json.loads(raw)
+
+
+class CompactJsonCodec(JsonCodec):
+    """Minified JSON, using orjson when it is installed."""
+    name = "compact"
+
+    def dumps(self, data) -> bytes:
+        if orjson is not None:
+            return orjson.dumps(data, default=_default)  # pylint: disable=no-member
+        return json.dumps(data, separators=(",", ":"), default=_default).encode("utf-8")
+
+
+class MsgpackCodec(Codec):
+    """Binary MessagePack encoding (requires the msgpack package)."""
+    name = "msgpack"
+
+    def __init__(self):
+        if msgpack is None:
+            raise RuntimeError("STORAGE_FORMAT=msgpack requires the 'msgpack' package")
+
+    def dumps(self, data) -> bytes:
+        return msgpack.packb(data, default=_default, use_bin_type=True)
+
+    def loads(self, raw: bytes):
+        return msgpack.unpackb(raw, raw=False)
+
+
+CODECS = {
+    JsonCodec.name: JsonCodec,
+    CompactJsonCodec.name: CompactJsonCodec,
+    MsgpackCodec.name: MsgpackCodec,
+}
+
+
+def get_codec(name: Optional[str] = None) -> Codec:
+    """Return the codec for a format name (defaults to STORAGE_FORMAT or json)."""
+    name = (name or os.getenv("STORAGE_FORMAT") or JsonCodec.name).lower()
+    if name not in CODECS:
+        raise ValueError(f"Unknown storage format '{name}', expected one of {', '.join(CODECS)}")
+    return CODECS[name]()
+
+
+def detect_format(raw: bytes) -> str:
+    """Detect whether stored bytes are JSON or MessagePack."""
+    stripped = raw.lstrip()
+    if not stripped:
+        raise ValueError("Cannot detect format of an empty file")
+    first = stripped[0]
+    if first in b"{[":
+        return JsonCodec.name
+    # MessagePack maps start with a fixmap (0x80-0x8f), map16 (0xde) or map32 (0xdf)
+    if 0x80 <= first <= 0x8f or first in (0xde, 0xdf):
+        return MsgpackCodec.name
+    raise ValueError("Unrecognised storage format")
+
+
+def dumps_json(data) -> bytes:
+    """Encode data as compact JSON bytes, e.g. for API responses."""
+    return CompactJsonCodec().dumps(data)
+
+
+def loads(raw: bytes):
+    """Decode stored bytes, auto-detecting the format."""
+    return get_codec(detect_format(raw)).loads(raw)
+
+
+def read_file(path: Path):
+    """Load a store file in whatever format it was written."""
+    with open(path, "rb") as f:
+        return loads(f.read())
+
+
+def write_file(path: Path, data, codec: Codec):
+    """Write data to a store file with the given codec.
+
+    Written to a temporary file that is then renamed over the original, so
+    readers, including other processes, never see a partially written file.
+    """
+    path = Path(path)
+    tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(codec.dumps(data))
+    os.replace(tmp_path, path)
+
+
+def convert_file(path: Path, target: str) -> str:
+    """Rewrite a store file in another format. Returns the source format."""
+    path = Path(path)
+    with open(path, "rb") as f:
+        raw = f.read()
+    source = detect_format(raw)
+    write_file(path, get_codec(source).loads(raw), get_codec(target))
+    return source
+
+
+if __name__ == "__main__":
+    if len(sys.argv) != 3:
+        print(f"Usage: python -m app.serialization <file> <{'|'.join(CODECS)}>")
+        sys.exit(1)
+    previous = convert_file(Path(sys.argv[1]), sys.argv[2])
+    print(f"Converted {sys.argv[1]} from {previous} to {sys.argv[2]}")
@@ -74,10 +74,27 @@ document.addEventListener('DOMContentLoaded', function() {
     });
     
     loadCanvasAssignmentsFromStorage();
+    subscribeToReminders();
     setupEventListeners();
     console.log('=== DOMContentLoaded END ===');
 });
 
+// Listen for reminder events pushed by the server
+function subscribeToReminders() {
+    if (!window.EventSource) return;
+    
+    const source = new EventSource('/api/reminders/stream');
+    source.addEventListener('reminder', function(event) {
+        const reminder = JSON.parse(event.data);
+        const when = new Date(reminder.at).toLocaleString();
+        if (reminder.type === 'due') {
+            showToast(`Task due: ${escapeHtml(reminder.title)} (${when})`, 'warning');
+        } else {
+            showToast(`Suggested time to work on: ${escapeHtml(reminder.title)}`, 'info');
+        }
+    });
+}
+
 // Setup event listeners
 function setupEventListeners() {
     console.log('=== setupEventListeners START ===');
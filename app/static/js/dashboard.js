@@ -13,6 +13,59 @@ async function loadStatistics() {
     } catch (error) {
         console.error('Error loading statistics:', error);
     }
+    await loadActivity();
+}
+
+// Load tasks created/completed per day (served from precomputed rollups)
+async function loadActivity() {
+    try {
+        const response = await fetch('/api/statistics/timeseries?bucket=day');
+        const data = await response.json();
+        updateActivityChart(data.series);
+    } catch (error) {
+        console.error('Error loading activity:', error);
+    }
+}
+
+// Update created/completed per day chart
+function updateActivityChart(days) {
+    const ctx = document.getElementById('activityChart');
+    if (!ctx || typeof Chart === 'undefined') return;
+    
+    const labels = days.map(day => day.start.slice(5));
+    const created = days.map(day => day.created);
+    const completed = days.map(day => day.completed);
+    
+    // Update in place on polls instead of recreating the chart
+    if (window.activityChartInstance) {
+        const chart = window.activityChartInstance;
+        chart.data.labels = labels;
+        chart.data.datasets[0].data = created;
+        chart.data.datasets[1].data = completed;
+        chart.update('none');
+        return;
+    }
+    
+    window.activityChartInstance = new Chart(ctx, {
+        type: 'bar',
+        data: {
+            labels: labels,
+            datasets: [
+                { label: 'Created', data: created, backgroundColor: '#6c757d' },
+                { label: 'Completed', data: completed, backgroundColor: '#198754' }
+            ]
+        },
+        options: {
+            responsive: true,
+            maintainAspectRatio: true,
+            scales: {
+                y: { beginAtZero: true, ticks: { precision: 0 } }
+            },
+            plugins: {
+                legend: { display: true, position: 'bottom' }
+            }
+        }
+    });
 }
 
 // Update dashboard with statistics
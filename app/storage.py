@@ -1,188 +1,443 @@
 import json
+import logging
 import os
+import threading
 import uuid
+from contextlib import contextmanager
 from pathlib import Path
-from typing import List, Optional, Dict
+from typing import List, Optional, Dict, Tuple
 from datetime import datetime
 import base64
 
+try:
+    import fcntl
+except ImportError:  # pragma: no cover - file locking is POSIX only
+    fcntl = None
+
 from app.models import Task, TaskCreate, TaskUpdate, TaskStatus, TaskPriority, Category, Statistics, UserProfile, UserProfileUpdate
+from app import serialization
+from app.metrics import STORAGE_CACHE, STORAGE_LATENCY, VALIDATION_LATENCY, ERRORS
+from app.avatars import AvatarStore
+from app.history import TaskHistory
+from app.records import TaskRecord, TaskTable, STATUS_CODES, PRIORITIES
+
 
+logger = logging.getLogger(__name__)
 
-class Storage:
-    def __init__(self, data_dir: str):
+
+class Storage:  # pylint: disable=too-many-instance-attributes,too-many-public-methods
+    def __init__(self, data_dir: str, storage_format: Optional[str] = None):
         self.data_dir = Path(data_dir)
+        self.codec = serialization.get_codec(storage_format)
         self.tasks_file = self.data_dir / "tasks.json"
         self.user_profile_file = self.data_dir / "user_profile.json"
         self.task_folders_dir = self.data_dir / "task_folders"
         self.avatars_dir = self.data_dir / "avatars"
+        self.lock_file = self.data_dir / ".lock"
+        
+        # Decoded tasks file, reused until the file changes on disk
+        self._table: Optional[TaskTable] = None
+        self._table_signature = None
         
-        # Ensure directories exist
-        self.data_dir.mkdir(parents=True, exist_ok=True)
-        self.task_folders_dir.mkdir(parents=True, exist_ok=True)
-        self.avatars_dir.mkdir(parents=True, exist_ok=True)
+        # Objects notified of task changes, see add_listener()
+        self._listeners = []
+        
+        # Change log of this store's tasks
+        self.history = TaskHistory(self.data_dir / "history.ndjson")
+        self.add_listener(self.history)
+        
+        # Directories and files are created lazily (see _ensure_initialized), so
+        # constructing a Storage does no I/O. The lock serializes table loads,
+        # which may happen from a warm-up thread and the event loop at once.
+        self._initialized = False
+        self._lock = threading.RLock()
+        self._write_locked = False
+    
+    def _ensure_initialized(self):
+        """Create the data directories and files on first use."""
+        if self._initialized:
+            return
+        with self._write_lock():
+            # Ensure directories exist
+            self.task_folders_dir.mkdir(parents=True, exist_ok=True)
+            self.avatars_dir.mkdir(parents=True, exist_ok=True)
+            
+            # Initialize storage
+            self._initialize_storage()
+            self._initialized = True
+    
+    @contextmanager
+    def _write_lock(self):
+        """Hold the store's write lock, shared by all threads and processes using the data directory.
         
-        # Initialize storage
-        self._initialize_storage()
+        Writers load, change and save the task table while holding it, so with
+        several server workers each change is applied to the latest version on
+        disk and none is lost. Readers need no lock, as files are replaced
+        atomically. Re-entrant within a thread; without fcntl (non-POSIX
+        systems) only threads of this process are serialized.
+        """
+        with self._lock:
+            if self._write_locked or fcntl is None:
+                yield
+                return
+            self.data_dir.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_file, "ab") as f:
+                with STORAGE_LATENCY.time(operation="lock"):
+                    fcntl.flock(f, fcntl.LOCK_EX)
+                self._write_locked = True
+                try:
+                    yield
+                finally:
+                    self._write_locked = False
+                    fcntl.flock(f, fcntl.LOCK_UN)
     
     def _initialize_storage(self):
         """Initialize storage files if they don't exist."""
         if not self.tasks_file.exists():
-            with open(self.tasks_file, 'w') as f:
-                json.dump({"tasks": [], "categories": []}, f)
+            serialization.write_file(self.tasks_file, {"tasks": [], "categories": []}, self.codec)
         
         if not self.user_profile_file.exists():
             # Create default user profile
             default_profile = UserProfile().model_dump()
-            with open(self.user_profile_file, 'w') as f:
-                json.dump(default_profile, f, indent=2)
+            self._write_profile(default_profile)
     
-    def _load_data(self) -> dict:
-        """Load data from JSON file."""
-        with open(self.tasks_file, 'r') as f:
-            return json.load(f)
+    def _write_profile(self, profile: dict):
+        """Replace the user profile file atomically."""
+        tmp_path = self.user_profile_file.with_name(f"{self.user_profile_file.name}.{os.getpid()}.tmp")
+        with open(tmp_path, 'w') as f:
+            json.dump(profile, f, indent=2)
+        os.replace(tmp_path, self.user_profile_file)
+    
+    def _file_signature(self):
+        """Cheap fingerprint of the tasks file used to detect external changes.
+        
+        Saves replace the file, so the inode changes on every write, including
+        writes by other processes within the same mtime tick.
+        """
+        stat = self.tasks_file.stat()
+        return (stat.st_ino, stat.st_mtime_ns, stat.st_size)
+    
+    def _load_data(self) -> TaskTable:
+        """Load the task table from the tasks file, detecting its format.
+        
+        The decoded table is kept resident and only re-read when the file
+        changes on disk.
+        """
+        with self._lock:
+            self._ensure_initialized()
+            signature = self._file_signature()
+            if self._table is not None and signature == self._table_signature:
+                STORAGE_CACHE.inc(result="hit")
+                return self._table
+            
+            STORAGE_CACHE.inc(result="miss")
+            with STORAGE_LATENCY.time(operation="load"):
+                self._table = TaskTable(serialization.read_file(self.tasks_file))
+            self._table_signature = signature
+            for listener in self._listeners:
+                self._call_listener(listener.tasks_loaded, self._table)
+            return self._table
+    
+    def _save_data(self, table: TaskTable):
+        """Save the task table to the tasks file in the configured format."""
+        try:
+            with STORAGE_LATENCY.time(operation="save"):
+                serialization.write_file(self.tasks_file, table.to_dict(), self.codec)
+        except Exception:
+            self._invalidate_cache()
+            raise
+        self._table = table
+        self._table_signature = self._file_signature()
+    
+    def add_listener(self, listener):
+        """Register a listener for task changes.
+        
+        The listener must provide task_changed(old, new), called with the old and
+        new TaskRecord after every saved create (old is None), update or delete
+        (new is None), and tasks_loaded(table), called whenever the task table is
+        (re)loaded from disk. It may also provide tasks_changed(changes), called
+        once with the (old, new) pairs of a bulk write such as an import instead
+        of task_changed for each of them.
+        """
+        self._listeners.append(listener)
+        if self._table is not None:
+            self._call_listener(listener.tasks_loaded, self._table)
     
-    def _save_data(self, data: dict):
-        """Save data to JSON file."""
-        with open(self.tasks_file, 'w') as f:
-            json.dump(data, f, indent=2, default=str)
+    def _notify_changed(self, old: Optional[TaskRecord], new: Optional[TaskRecord]):
+        for listener in self._listeners:
+            self._call_listener(listener.task_changed, old, new)
+    
+    def _notify_batch(self, changes: List[Tuple[Optional[TaskRecord], Optional[TaskRecord]]]):
+        for listener in self._listeners:
+            hook = getattr(listener, "tasks_changed", None)
+            if hook is not None:
+                self._call_listener(hook, changes)
+                continue
+            for old, new in changes:
+                self._call_listener(listener.task_changed, old, new)
+    
+    @staticmethod
+    def _call_listener(hook, *args):
+        # A failing listener must not fail the write that already hit the disk
+        try:
+            hook(*args)
+        except Exception:
+            ERRORS.inc(component="storage_listener")
+            logger.exception("Storage listener %s failed", hook)
+    
+    def warm_up(self) -> int:
+        """Load the task table into memory ahead of the first request.
+        
+        Returns the number of tasks loaded.
+        """
+        return len(self._load_data().records)
+    
+    def is_loaded(self) -> bool:
+        """Whether the task table is resident (it is still re-read if the file changes)."""
+        return self._table is not None
+    
+    def _invalidate_cache(self):
+        """Drop the resident table so the next read goes back to disk."""
+        self._table = None
+        self._table_signature = None
     
     def create_task(self, task_create: TaskCreate) -> Task:
         """Create a new task."""
-        data = self._load_data()
-        
-        task_id = str(uuid.uuid4())
-        folder_name = f"task_{task_id[:8]}"
-        folder_path = str(self.task_folders_dir / folder_name)
-        
-        # Create task folder
-        os.makedirs(folder_path, exist_ok=True)
-        
-        task = Task(
-            id=task_id,
-            title=task_create.title,
-            description=task_create.description,
-            category=task_create.category,
-            priority=task_create.priority,
-            due_date=task_create.due_date,
-            folder_path=folder_path
-        )
+        with self._write_lock():
+            table = self._load_data()
+            
+            task_id = str(uuid.uuid4())
+            folder_name = f"task_{task_id[:8]}"
+            folder_path = str(self.task_folders_dir / folder_name)
+            
+            # Create task folder
+            os.makedirs(folder_path, exist_ok=True)
+            
+            with VALIDATION_LATENCY.time():
+                task = Task(
+                    id=task_id,
+                    title=task_create.title,
+                    description=task_create.description,
+                    category=task_create.category,
+                    priority=task_create.priority,
+                    due_date=task_create.due_date,
+                    folder_path=folder_path
+                )
+            
+            record = TaskRecord.from_task(task)
+            table.append(record)
+            
+            # Ensure category exists
+            if task_create.category not in [c["name"] for c in table.categories]:
+                table.categories.append({"name": task_create.category, "color": "#007bff"})
+            
+            self._save_data(table)
+            self._notify_changed(None, record)
+            return task
+    
+    def get_task_table(self) -> TaskTable:
+        """Get the resident task table.
         
-        data["tasks"].append(task.model_dump())
+        The table is shared with the cache and must not be modified.
+        """
+        return self._load_data()
+    
+    def get_task_records(self, category: Optional[str] = None, status: Optional[TaskStatus] = None) -> List[TaskRecord]:
+        """Get resident task records without building Task models.
         
-        # Ensure category exists
-        if task_create.category not in [c["name"] for c in data["categories"]]:
-            data["categories"].append({"name": task_create.category, "color": "#007bff"})
+        The returned records are shared with the cache and must not be modified.
+        """
+        tasks = self._load_data().records
         
-        self._save_data(data)
-        return task
+        if category:
+            tasks = [t for t in tasks if t.category == category]
+        if status:
+            status_code = STATUS_CODES[status]
+            tasks = [t for t in tasks if t.status == status_code]
+        
+        return tasks
     
-    def get_tasks(self, category: Optional[str] = None, status: Optional[TaskStatus] = None) -> List[Task]:
-        """Get all tasks, optionally filtered by category and status."""
-        data = self._load_data()
-        tasks = data["tasks"]
+    def get_task_record(self, task_id: str) -> Optional[TaskRecord]:
+        """Get a resident task record by ID."""
+        return self._load_data().index.get(task_id)
+    
+    def search_task_records(self, query: str) -> List[TaskRecord]:
+        """Search resident task records by title or description."""
+        query_lower = query.lower()
+        
+        return [
+            task for task in self._load_data().records
+            if (query_lower in task.title.lower() or 
+                (task.description and query_lower in task.description.lower()))
+        ]
+    
+    def get_due_task_records(self, start: Optional[datetime] = None, end: Optional[datetime] = None,
+                             status: Optional[TaskStatus] = None,
+                             exclude_completed: bool = False) -> List[TaskRecord]:
+        """Get records due between start and end (inclusive, either may be open), earliest first."""
+        tasks = self._load_data().due_between(
+            start.timestamp() if start else None,
+            end.timestamp() if end else None
+        )
         
-        if category:
-            tasks = [t for t in tasks if t["category"] == category]
         if status:
-            tasks = [t for t in tasks if t["status"] == status]
+            status_code = STATUS_CODES[status]
+            tasks = [t for t in tasks if t.status == status_code]
+        if exclude_completed:
+            completed = STATUS_CODES[TaskStatus.completed]
+            tasks = [t for t in tasks if t.status != completed]
         
-        return [Task(**task) for task in tasks]
+        return tasks
+    
+    def get_tasks(self, category: Optional[str] = None, status: Optional[TaskStatus] = None) -> List[Task]:
+        """Get all tasks, optionally filtered by category and status."""
+        return [task.to_task() for task in self.get_task_records(category, status)]
     
     def get_task(self, task_id: str) -> Optional[Task]:
         """Get a specific task by ID."""
-        data = self._load_data()
-        for task in data["tasks"]:
-            if task["id"] == task_id:
-                return Task(**task)
-        return None
+        task = self.get_task_record(task_id)
+        return task.to_task() if task else None
     
     def update_task(self, task_id: str, task_update: TaskUpdate) -> Optional[Task]:
         """Update a task."""
-        data = self._load_data()
-        
-        for i, task in enumerate(data["tasks"]):
-            if task["id"] == task_id:
-                # Update only provided fields
-                update_dict = task_update.model_dump(exclude_unset=True)
-                for key, value in update_dict.items():
-                    data["tasks"][i][key] = value
-                
-                self._save_data(data)
-                return Task(**data["tasks"][i])
-        
-        return None
+        with self._write_lock():
+            table = self._load_data()
+            record = table.index.get(task_id)
+            if record is None:
+                return None
+            
+            # Update only provided fields and validate the result before storing it
+            update_dict = task_update.model_dump(exclude_unset=True)
+            with VALIDATION_LATENCY.time():
+                updated = Task(**{**record.to_task().model_dump(), **update_dict})
+            new_record = TaskRecord.from_task(updated)
+            table.replace(new_record)
+            
+            self._save_data(table)
+            self._notify_changed(record, new_record)
+            return updated
     
     def delete_task(self, task_id: str) -> bool:
         """Delete a task and its folder."""
-        data = self._load_data()
-        
-        for i, task in enumerate(data["tasks"]):
-            if task["id"] == task_id:
-                # Delete task folder
-                folder_path = task["folder_path"]
-                if os.path.exists(folder_path):
-                    import shutil
-                    shutil.rmtree(folder_path)
-                
-                # Remove task from list
-                data["tasks"].pop(i)
-                self._save_data(data)
-                return True
+        with self._write_lock():
+            table = self._load_data()
+            record = table.remove(task_id)
+            if record is None:
+                return False
+            
+            # Delete task folder, but never anything outside task_folders
+            if self.is_task_folder(record.folder_path) and os.path.exists(record.folder_path):
+                import shutil
+                shutil.rmtree(record.folder_path)
+            elif os.path.exists(record.folder_path):
+                logger.warning("Not deleting folder %s of task %s: outside %s",
+                               record.folder_path, task_id, self.task_folders_dir)
+            
+            self._save_data(table)
+            self._notify_changed(record, None)
+            return True
+    
+    def is_task_folder(self, folder_path: str) -> bool:
+        """Whether folder_path resolves to a directory strictly inside task_folders_dir."""
+        root = self.task_folders_dir.resolve()
+        path = Path(folder_path).resolve()
+        return path != root and root in path.parents
+    
+    def reorder_tasks(self, task_order: List[str]):
+        """Reorder tasks; tasks missing from task_order keep their relative order at the end."""
+        with self._write_lock():
+            table = self._load_data()
+            
+            reordered_tasks = [table.index[task_id] for task_id in task_order if task_id in table.index]
+            
+            # Add any tasks not in the order (just in case)
+            ordered_ids = set(task_order)
+            reordered_tasks.extend(task for task in table.records if task.id not in ordered_ids)
+            
+            table.records = reordered_tasks
+            self._save_data(table)
+    
+    def import_tasks(self, tasks: List[Task], categories: Optional[List[dict]] = None,
+                     replace: bool = False) -> Dict[str, int]:
+        """Add a batch of validated tasks and categories with a single save.
         
-        return False
+        Tasks whose ID already exists are skipped, or replaced if replace is
+        set. Returns the number of imported, replaced and skipped tasks.
+        """
+        with self._write_lock():
+            table = self._load_data()
+            counts = {"imported": 0, "replaced": 0, "skipped": 0}
+            known = {c["name"] for c in table.categories}
+            changes = []
+            
+            for category in categories or []:
+                if category["name"] not in known:
+                    table.categories.append({"name": category["name"], "color": category.get("color", "#007bff")})
+                    known.add(category["name"])
+            
+            for task in tasks:
+                record = TaskRecord.from_task(task)
+                old = table.index.get(record.id)
+                if old is None:
+                    table.append(record)
+                    counts["imported"] += 1
+                elif replace:
+                    table.replace(record)
+                    counts["replaced"] += 1
+                else:
+                    counts["skipped"] += 1
+                    continue
+                
+                os.makedirs(record.folder_path, exist_ok=True)
+                if record.category not in known:
+                    table.categories.append({"name": record.category, "color": "#007bff"})
+                    known.add(record.category)
+                changes.append((old, record))
+            
+            if changes or categories:
+                self._save_data(table)
+            if changes:
+                self._notify_batch(changes)
+            return counts
     
     def search_tasks(self, query: str) -> List[Task]:
         """Search tasks by title or description."""
-        data = self._load_data()
-        query_lower = query.lower()
-        
-        matching_tasks = []
-        for task in data["tasks"]:
-            if (query_lower in task["title"].lower() or 
-                (task.get("description") and query_lower in task["description"].lower())):
-                matching_tasks.append(Task(**task))
-        
-        return matching_tasks
+        return [task.to_task() for task in self.search_task_records(query)]
     
     def get_categories(self) -> List[Category]:
         """Get all categories."""
-        data = self._load_data()
-        return [Category(**cat) for cat in data["categories"]]
+        table = self._load_data()
+        return [Category(**cat) for cat in table.categories]
     
     def get_statistics(self) -> Statistics:
         """Get task statistics."""
-        data = self._load_data()
-        tasks = data["tasks"]
+        tasks = self._load_data().records
         
         total_tasks = len(tasks)
-        completed_tasks = len([t for t in tasks if t["status"] == "completed"])
-        pending_tasks = len([t for t in tasks if t["status"] == "pending"])
-        in_progress_tasks = len([t for t in tasks if t["status"] == "in_progress"])
-        
-        completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
-        
-        # Tasks by category
+        status_counts = [0] * len(STATUS_CODES)
+        priority_counts = [0] * len(PRIORITIES)
         tasks_by_category = {}
+        ai_action_enabled = 0
         for task in tasks:
-            cat = task["category"]
-            tasks_by_category[cat] = tasks_by_category.get(cat, 0) + 1
+            status_counts[task.status] += 1
+            priority_counts[task.priority] += 1
+            tasks_by_category[task.category] = tasks_by_category.get(task.category, 0) + 1
+            ai_action_enabled += task.has_ai_button
+        
+        completed_tasks = status_counts[STATUS_CODES["completed"]]
+        completion_rate = (completed_tasks / total_tasks * 100) if total_tasks > 0 else 0
         
         # Tasks by priority
-        tasks_by_priority = {"low": 0, "medium": 0, "high": 0}
-        for task in tasks:
-            priority = task["priority"]
-            tasks_by_priority[priority] = tasks_by_priority.get(priority, 0) + 1
+        tasks_by_priority = {priority.value: count for priority, count in zip(PRIORITIES, priority_counts)}
         
         # AI action distribution
-        ai_action_enabled = len([t for t in tasks if t.get("has_ai_button", False)])
         ai_action_disabled = total_tasks - ai_action_enabled
         
         return Statistics(
             total_tasks=total_tasks,
             completed_tasks=completed_tasks,
-            pending_tasks=pending_tasks,
-            in_progress_tasks=in_progress_tasks,
+            pending_tasks=status_counts[STATUS_CODES["pending"]],
+            in_progress_tasks=status_counts[STATUS_CODES["in_progress"]],
             completion_rate=round(completion_rate, 2),
             tasks_by_category=tasks_by_category,
             tasks_by_priority=tasks_by_priority,
@@ -192,37 +447,43 @@ class Storage:
     
     def get_user_profile(self) -> UserProfile:
         """Get user profile."""
+        self._ensure_initialized()
         with open(self.user_profile_file, 'r') as f:
             data = json.load(f)
         return UserProfile(**data)
     
     def update_user_profile(self, profile_update: UserProfileUpdate) -> UserProfile:
-        """Update user profile."""
-        current_profile = self.get_user_profile()
-        
-        # Update only provided fields
-        update_dict = profile_update.model_dump(exclude_unset=True)
-        
-        # Handle avatar - save to file if base64 provided
-        if 'avatar' in update_dict and update_dict['avatar']:
-            if update_dict['avatar'].startswith('data:image'):
-                # Extract base64 data and save
-                header, encoded = update_dict['avatar'].split(',', 1)
-                ext = header.split('/')[1].split(';')[0]
-                avatar_filename = f"avatar_{uuid.uuid4().hex[:8]}.{ext}"
-                avatar_path = self.avatars_dir / avatar_filename
-                
-                with open(avatar_path, 'wb') as f:
-                    f.write(base64.b64decode(encoded))
-                
-                update_dict['avatar'] = str(avatar_path)
-        
-        # Update current profile
-        for key, value in update_dict.items():
-            setattr(current_profile, key, value)
-        
-        # Save updated profile
-        with open(self.user_profile_file, 'w') as f:
-            json.dump(current_profile.model_dump(), f, indent=2)
+        """Update user profile.
         
-        return current_profile
\ No newline at end of file
+        Uploaded avatars are stored under a content hash, and avatar files
+        the profile no longer refers to are deleted afterwards.
+        """
+        with self._write_lock():
+            current_profile = self.get_user_profile()
+            avatars = AvatarStore(self.avatars_dir)
+            
+            # Update only provided fields
+            update_dict = profile_update.model_dump(exclude_unset=True)
+            
+            # Handle avatar - save to file if base64 provided
+            if 'avatar' in update_dict and update_dict['avatar']:
+                if update_dict['avatar'].startswith('data:image'):
+                    # Extract base64 data and save
+                    header, encoded = update_dict['avatar'].split(',', 1)
+                    ext = header.split('/')[1].split(';')[0]
+                    avatar_path = avatars.save(base64.b64decode(encoded), ext)
+                    
+                    update_dict['avatar'] = str(avatar_path)
+            
+            # Update current profile
+            for key, value in update_dict.items():
+                setattr(current_profile, key, value)
+            
+            # Save updated profile
+            self._write_profile(current_profile.model_dump())
+            
+            # The profile may refer to its avatar by path or by URL; either way the file name comes last
+            keep = [current_profile.avatar.rsplit('/', 1)[-1]] if current_profile.avatar else []
+            avatars.collect_garbage(keep)
+            
+            return current_profile
\ No newline at end of file
@@ -0,0 +1,179 @@
+import asyncio
+import os
+import signal
+import sys
+import time
+from typing import List, Optional
+
+try:
+    import resource
+except ImportError:  # pragma: no cover - not available on Windows
+    resource = None
+
+# Seconds a process group gets to exit after SIGTERM before it is SIGKILLed
+TERMINATE_GRACE_SECONDS = 2.0
+
+# Seconds to keep reading output after a kill; descendants in their own session may hold the pipes open
+DRAIN_TIMEOUT_SECONDS = 2.0
+
+
+# Sets the limits given as its first two arguments, then execs the rest. Limits are
+# set in a separate interpreter rather than in a preexec_fn, which is not safe to
+# run in a forked child of a threaded process.
+_LIMITS_WRAPPER = """
+import os, resource, sys
+cpu_seconds, memory_bytes = int(sys.argv[1]), int(sys.argv[2])
+if cpu_seconds:
+    # The soft limit sends SIGXCPU, the hard limit one second later SIGKILL
+    resource.setrlimit(resource.RLIMIT_CPU, (cpu_seconds, cpu_seconds + 1))
+if memory_bytes:
+    resource.setrlimit(resource.RLIMIT_AS, (memory_bytes, memory_bytes))
+os.execvp(sys.argv[3], sys.argv[3:])
+"""
+
+
+class ResourceLimits:
+    """Per-process rlimits applied to supervised children (POSIX only).
+
+    A value of 0 or None leaves that limit unset.
+    """
+
+    def __init__(self, cpu_seconds: Optional[int] = None, memory_bytes: Optional[int] = None):
+        self.cpu_seconds = cpu_seconds
+        self.memory_bytes = memory_bytes
+
+    @classmethod
+    def from_env(cls, prefix: str) -> "ResourceLimits":
+        """Read <prefix>_MAX_CPU_SECONDS and <prefix>_MAX_MEMORY_MB."""
+        cpu_seconds = int(os.getenv(f"{prefix}_MAX_CPU_SECONDS", "0") or 0)
+        memory_mb = int(os.getenv(f"{prefix}_MAX_MEMORY_MB", "0") or 0)
+        return cls(cpu_seconds or None, memory_mb * 1024 * 1024 or None)
+
+    def wrap(self, argv: List[str]) -> List[str]:
+        """argv prefixed with a small launcher that sets the limits and then execs the command."""
+        if not self.cpu_seconds and not self.memory_bytes:
+            return argv
+        return [sys.executable, "-I", "-c", _LIMITS_WRAPPER,
+                str(self.cpu_seconds or 0), str(self.memory_bytes or 0), *argv]
+
+
+class RunResult:
+    """Outcome and resource usage of one supervised run."""
+
+    def __init__(self, *, returncode: Optional[int], stdout: bytes, stderr: bytes, timed_out: bool,
+                 wall_seconds: float, cpu_seconds: Optional[float]):
+        self.returncode = returncode
+        self.stdout = stdout
+        self.stderr = stderr
+        self.timed_out = timed_out
+        self.wall_seconds = wall_seconds
+        self.cpu_seconds = cpu_seconds
+
+    @property
+    def ok(self) -> bool:
+        return self.returncode == 0 and not self.timed_out
+
+    def usage(self) -> dict:
+        return {
+            "returncode": self.returncode,
+            "timed_out": self.timed_out,
+            "wall_seconds": round(self.wall_seconds, 3),
+            "cpu_seconds": round(self.cpu_seconds, 3) if self.cpu_seconds is not None else None,
+        }
+
+
+def _children_usage():
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_CHILDREN)
+
+
+async def _read_all(stream, chunks: List[bytes]):
+    """Collect a pipe's output in chunks, so what was read survives if the reader is cancelled."""
+    while True:
+        chunk = await stream.read(64 * 1024)
+        if not chunk:
+            return
+        chunks.append(chunk)
+
+
+async def _kill_group(process):
+    """Terminate the child's whole process group, escalating to SIGKILL."""
+    if os.name != "posix":
+        if process.returncode is None:
+            process.kill()
+        await process.wait()
+        return
+    try:
+        if process.returncode is None:
+            os.killpg(process.pid, signal.SIGTERM)
+            try:
+                await asyncio.wait_for(process.wait(), timeout=TERMINATE_GRACE_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+        # Descendants may outlive the leader (and keep its pipes open), so always sweep the group
+        os.killpg(process.pid, signal.SIGKILL)
+    except ProcessLookupError:
+        pass
+    await process.wait()
+
+
+async def run_supervised(argv: List[str], timeout: float,
+                         limits: Optional[ResourceLimits] = None) -> RunResult:
+    """Run a command in its own process group with rlimits and a hard timeout.
+
+    On timeout, or if the awaiting task is cancelled, the entire process group
+    is terminated so no descendants are left running. CPU time is taken from
+    the RUSAGE_CHILDREN delta, so it is approximate when several supervised
+    processes finish at the same time. Peak memory is not reported: the
+    RUSAGE_CHILDREN maximum covers every child ever reaped, and the child's
+    own rusage is consumed by asyncio's child watcher.
+    """
+    posix = os.name == "posix"
+    if limits and posix and resource is not None:
+        argv = limits.wrap(argv)
+    before = _children_usage()
+    start = time.perf_counter()
+
+    process = await asyncio.create_subprocess_exec(
+        *argv,
+        stdout=asyncio.subprocess.PIPE,
+        stderr=asyncio.subprocess.PIPE,
+        start_new_session=posix
+    )
+
+    # Output is read by separate tasks that outlive a timeout, so nothing
+    # already written is lost when the process group is killed
+    stdout_chunks: List[bytes] = []
+    stderr_chunks: List[bytes] = []
+    readers = [asyncio.create_task(_read_all(process.stdout, stdout_chunks)),
+               asyncio.create_task(_read_all(process.stderr, stderr_chunks))]
+    timed_out = False
+    try:
+        _, pending = await asyncio.wait([*readers, asyncio.ensure_future(process.wait())], timeout=timeout)
+        if pending:
+            timed_out = True
+            await _kill_group(process)
+            # Keep reading what was written before the kill, until the pipes close
+            await asyncio.wait(readers, timeout=DRAIN_TIMEOUT_SECONDS)
+    except asyncio.CancelledError:
+        await _kill_group(process)
+        raise
+    finally:
+        for reader in readers:
+            reader.cancel()
+    stdout, stderr = b"".join(stdout_chunks), b"".join(stderr_chunks)
+
+    after = _children_usage()
+    cpu_seconds = None
+    if before is not None and after is not None:
+        cpu_seconds = (after.ru_utime - before.ru_utime) + (after.ru_stime - before.ru_stime)
+
+    return RunResult(
+        returncode=process.returncode,
+        stdout=stdout,
+        stderr=stderr,
+        timed_out=timed_out,
+        wall_seconds=time.perf_counter() - start,
+        cpu_seconds=cpu_seconds
+    )
@@ -0,0 +1,234 @@
+import logging
+import queue
+import re
+import tarfile
+import tempfile
+import threading
+import time
+import uuid
+from pathlib import Path
+from typing import Iterator, List, Tuple
+
+from pydantic import ValidationError
+
+from app import serialization
+from app.metrics import VALIDATION_LATENCY
+from app.models import Task
+from app.storage import Storage
+
+logger = logging.getLogger(__name__)
+
+# Records encoded per chunk of the NDJSON export
+EXPORT_CHUNK_SIZE = 500
+
+# Tar export: size of the blocks handed to the client, and how many may be buffered
+TAR_BLOCK_SIZE = 64 * 1024
+TAR_QUEUE_SIZE = 16
+
+# Validated import batches are buffered and stored together, since every store
+# rewrites tasks.json: at most once per this many seconds, or once this many
+# tasks are waiting, and at the end of the import
+IMPORT_COMMIT_INTERVAL = 5.0
+IMPORT_COMMIT_MAX_TASKS = 50000
+
+# Invalid import lines reported back in detail; the rest are only counted
+MAX_REPORTED_ERRORS = 20
+
+# Imported folder names are kept only if they are plain names like the ones the store creates
+SAFE_FOLDER_NAME = re.compile(r"[A-Za-z0-9_-]+")
+
+
+def iter_ndjson(storage: Storage) -> Iterator[bytes]:
+    """Stream the store as NDJSON: a categories line, then one line per task.
+
+    Works from a snapshot of the record list, encoding EXPORT_CHUNK_SIZE
+    records at a time, so only one chunk of output is in memory at once.
+    """
+    table = storage.get_task_table()
+    records = list(table.records)
+    yield serialization.dumps_json({"categories": table.categories}) + b"\n"
+    for start in range(0, len(records), EXPORT_CHUNK_SIZE):
+        chunk = records[start:start + EXPORT_CHUNK_SIZE]
+        yield b"".join(serialization.dumps_json(record.to_dict()) + b"\n" for record in chunk)
+
+
+class _ExportCancelled(Exception):
+    pass
+
+
+class _QueueWriter:
+    """Write-only file object handing tarfile's output to a bounded queue."""
+
+    def __init__(self, chunks: queue.Queue, cancelled: threading.Event):
+        self.chunks = chunks
+        self.cancelled = cancelled
+
+    def write(self, data) -> int:
+        self.put(bytes(data))
+        return len(data)
+
+    def put(self, item):
+        # Block while the client is slow, but give up once it has gone away
+        while True:
+            if self.cancelled.is_set():
+                raise _ExportCancelled()
+            try:
+                self.chunks.put(item, timeout=0.5)
+                return
+            except queue.Full:
+                continue
+
+
+def _write_tar(storage: Storage, writer: _QueueWriter):
+    """Write tasks.ndjson and the task folders as a streaming tar archive."""
+    with tarfile.open(fileobj=writer, mode="w|", bufsize=TAR_BLOCK_SIZE) as tar:
+        # Tar headers need the member size up front, so spool the NDJSON to a temp file first
+        with tempfile.TemporaryFile() as ndjson:
+            for chunk in iter_ndjson(storage):
+                ndjson.write(chunk)
+            info = tarfile.TarInfo("tasks.ndjson")
+            info.size = ndjson.tell()
+            ndjson.seek(0)
+            tar.addfile(info, ndjson)
+
+        for record in list(storage.get_task_table().records):
+            folder = Path(record.folder_path)
+            if storage.is_task_folder(folder) and folder.is_dir():
+                tar.add(folder, arcname=f"task_folders/{folder.name}")
+
+
+def iter_tar(storage: Storage) -> Iterator[bytes]:
+    """Stream the store and its task folders as a tar archive.
+
+    The archive is written by a background thread into a bounded queue,
+    so memory use stays constant however large the folders are.
+    """
+    chunks: queue.Queue = queue.Queue(maxsize=TAR_QUEUE_SIZE)
+    cancelled = threading.Event()
+    writer = _QueueWriter(chunks, cancelled)
+
+    def produce():
+        result = None
+        try:
+            _write_tar(storage, writer)
+        except _ExportCancelled:
+            return
+        except Exception as e:  # pylint: disable=broad-exception-caught
+            logger.exception("Tar export failed")
+            result = e
+        try:
+            writer.put(result)
+        except _ExportCancelled:
+            pass
+
+    threading.Thread(target=produce, name="open2do-export", daemon=True).start()
+    try:
+        while True:
+            chunk = chunks.get()
+            if chunk is None:
+                return
+            if isinstance(chunk, Exception):
+                # Abort the response so the client sees a truncated download, not a valid-looking one
+                raise chunk
+            yield chunk
+    finally:
+        cancelled.set()
+
+
+class TaskImporter:  # pylint: disable=too-many-instance-attributes
+    """Validates NDJSON lines and adds them to the store in batches.
+
+    Lines are read by the caller and handed over with add(); once
+    batch_size lines are pending, flush() validates them. Validated tasks
+    are stored every IMPORT_COMMIT_INTERVAL seconds or
+    IMPORT_COMMIT_MAX_TASKS tasks, and by finish() at the end, so a large
+    import saves the store a bounded number of times instead of once per
+    batch. Tasks whose ID already exists are skipped, or replaced when
+    replace is set. Task folders are placed in the target store's
+    task_folders directory.
+    """
+
+    def __init__(self, storage: Storage, batch_size: int = 1000, replace: bool = False):
+        self.storage = storage
+        self.batch_size = batch_size
+        self.replace = replace
+        self.counts = {"imported": 0, "replaced": 0, "skipped": 0, "invalid": 0, "batches": 0}
+        self.errors: List[dict] = []
+        self._pending: List[Tuple[int, bytes]] = []
+        self._line_number = 0
+        self._tasks: List[Task] = []
+        self._categories: List[dict] = []
+        self._last_commit = time.monotonic()
+
+    def add(self, line: bytes) -> bool:
+        """Queue one line; returns True once a full batch is waiting to be flushed."""
+        self._line_number += 1
+        if line.strip():
+            self._pending.append((self._line_number, line))
+        return len(self._pending) >= self.batch_size
+
+    def _invalid(self, line_number: int, message: str):
+        self.counts["invalid"] += 1
+        if len(self.errors) < MAX_REPORTED_ERRORS:
+            self.errors.append({"line": line_number, "error": message})
+
+    def _parse(self, line_number: int, line: bytes, categories: List[dict]):
+        """Task for one line, or None for category lines and invalid input."""
+        try:
+            data = serialization.get_codec("json").loads(line)
+        except ValueError as e:
+            self._invalid(line_number, f"Invalid JSON: {e}")
+            return None
+        if not isinstance(data, dict):
+            self._invalid(line_number, "Expected a JSON object")
+            return None
+        if "categories" in data and "id" not in data:
+            if not isinstance(data["categories"], list):
+                self._invalid(line_number, "categories: Expected a list")
+                return None
+            categories.extend(c for c in data["categories"] if isinstance(c, dict) and c.get("name"))
+            return None
+
+        data.setdefault("id", str(uuid.uuid4()))
+        folder_name = Path(str(data.get("folder_path") or "")).name
+        if not SAFE_FOLDER_NAME.fullmatch(folder_name):
+            # Names like "..", "" or "." would point at the data directory or task_folders itself
+            folder_name = "task_" + re.sub(r"[^A-Za-z0-9_-]", "_", str(data["id"])[:8])
+        data["folder_path"] = str(self.storage.task_folders_dir / folder_name)
+        try:
+            with VALIDATION_LATENCY.time():
+                return Task.model_validate(data)
+        except ValidationError as e:
+            self._invalid(line_number, "; ".join(
+                f"{'.'.join(str(part) for part in error['loc'])}: {error['msg']}" for error in e.errors()))
+            return None
+
+    def flush(self):
+        """Validate the pending lines, storing them if a commit is due."""
+        for line_number, line in self._pending:
+            task = self._parse(line_number, line, self._categories)
+            if task is not None:
+                self._tasks.append(task)
+        self._pending = []
+        if (len(self._tasks) >= IMPORT_COMMIT_MAX_TASKS
+                or time.monotonic() - self._last_commit >= IMPORT_COMMIT_INTERVAL):
+            self._commit()
+
+    def finish(self):
+        """Validate and store everything still pending."""
+        self.flush()
+        self._commit()
+
+    def _commit(self):
+        self._last_commit = time.monotonic()
+        if not self._tasks and not self._categories:
+            return
+        result = self.storage.import_tasks(self._tasks, self._categories, replace=self.replace)
+        self._tasks = []
+        self._categories = []
+        for key, value in result.items():
+            self.counts[key] += value
+        self.counts["batches"] += 1
+
+    def summary(self) -> dict:
+        return {**self.counts, "errors": self.errors}
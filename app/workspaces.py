@@ -0,0 +1,79 @@
+import re
+import threading
+from collections import OrderedDict
+from pathlib import Path
+from typing import Optional
+
+from app.metrics import WORKSPACES_OPEN, WORKSPACE_EVICTIONS
+from app.storage import Storage
+
+DEFAULT_WORKSPACE = "default"
+
+# Workspace names become directory names, so keep them to a safe character set
+WORKSPACE_NAME = re.compile(r"[A-Za-z0-9_-]{1,64}")
+
+
+class WorkspaceRegistry:  # pylint: disable=too-many-instance-attributes
+    """Opens one Storage per workspace and keeps the most recently used ones resident.
+
+    The default workspace lives in the main data directory and is never
+    evicted; every other workspace gets its own directory under root_dir.
+    Evicting a workspace only drops its cached task table: the next
+    request reopens it from disk.
+    """
+
+    def __init__(self, default_dir: str, root_dir: str, max_open: int = 16,
+                 storage_format: Optional[str] = None):
+        self.default_dir = Path(default_dir)
+        self.root_dir = Path(root_dir)
+        self.max_open = max(max_open, 1)
+        self.storage_format = storage_format
+        self._default = Storage(str(self.default_dir), storage_format)
+        self._open: "OrderedDict[str, Storage]" = OrderedDict()
+        self._listeners = []
+        self._lock = threading.Lock()
+
+    def add_listener(self, listener):
+        """Register an object with a workspace_opened(name, storage) hook.
+
+        The hook runs for the default workspace straight away and for every
+        other workspace each time it is (re)opened.
+        """
+        self._listeners.append(listener)
+        listener.workspace_opened(DEFAULT_WORKSPACE, self._default)
+
+    def path_for(self, name: str) -> Path:
+        if name == DEFAULT_WORKSPACE:
+            return self.default_dir
+        if not WORKSPACE_NAME.fullmatch(name):
+            raise ValueError(f"Invalid workspace name: {name!r}")
+        return self.root_dir / name
+
+    def get(self, name: Optional[str] = None) -> Storage:
+        """Storage for the named workspace, opening it (and evicting the least recently used) if needed."""
+        name = name or DEFAULT_WORKSPACE
+        if name == DEFAULT_WORKSPACE:
+            return self._default
+        path = self.path_for(name)
+
+        with self._lock:
+            storage = self._open.get(name)
+            if storage is not None:
+                self._open.move_to_end(name)
+                return storage
+
+            storage = Storage(str(path), self.storage_format)
+            self._open[name] = storage
+            while len(self._open) > self.max_open:
+                self._open.popitem(last=False)
+                WORKSPACE_EVICTIONS.inc()
+            WORKSPACES_OPEN.set(len(self._open) + 1)
+
+        for listener in self._listeners:
+            listener.workspace_opened(name, storage)
+        return storage
+
+    def open_workspaces(self):
+        """Names of the resident workspaces, least recently used first."""
+        with self._lock:
+            return [DEFAULT_WORKSPACE] + list(self._open)
@@ -0,0 +1,148 @@
+"""In-process load test of the HTTP API on synthetic stores.
+
+Each store size runs in a fresh interpreter with DATA_DIR pointing at a
+generated store and IFLOW_COMMAND pointing at benchmarks/fake_iflow.py,
+then drives app.main through FastAPI's TestClient. At a concurrency of N,
+each scenario is issued repeat times from N threads sharing the client, so
+requests contend for the event loop, the storage lock and the iFlow
+slots like they do in a busy server; throughput_rps is the number of
+requests completed per second of wall time. Requires httpx (see
+benchmarks/requirements.txt). Run from the repository root:
+
+    python -m benchmarks.bench_api [--sizes 1000 10000] [--repeat 20] [--concurrency 1 4] [--iflow-latency 0.05]
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+
+from benchmarks.common import make_parser, report, summarize
+from benchmarks.synthetic import write_store
+
+FAKE_IFLOW = Path(__file__).with_name("fake_iflow.py")
+# Tasks toggled per bulk request, mirroring the "Enable/Disable AI Action" bulk action
+BULK_SIZE = 50
+# Concurrent clients each scenario is run with by default
+CONCURRENCY = (1, 4)
+
+
+def _scenarios(client, rng: random.Random) -> dict:
+    task_ids = [task["id"] for task in client.get("/api/tasks").json()["tasks"]]
+    created = []
+
+    def create():
+        response = client.post("/api/tasks", json={"title": "Benchmark task", "category": "Work"})
+        created.append(response.json()["id"])
+
+    def delete():
+        if created:
+            client.delete(f"/api/tasks/{created.pop()}")
+
+    def reorder():
+        order = task_ids[:]
+        rng.shuffle(order)
+        client.post("/api/tasks/reorder", json={"task_order": order})
+
+    def bulk_toggle():
+        for task_id in rng.sample(task_ids, min(BULK_SIZE, len(task_ids))):
+            client.put(f"/api/tasks/{task_id}", json={"has_ai_button": True})
+
+    return {
+        "list": lambda: client.get("/api/tasks"),
+        "list_filtered": lambda: client.get("/api/tasks", params={"category": "Work", "status": "pending"}),
+        "get": lambda: client.get(f"/api/tasks/{rng.choice(task_ids)}"),
+        "search": lambda: client.get("/api/tasks/search/report"),
+        "due_overdue": lambda: client.get("/api/tasks/due", params={"overdue": "true"}),
+        "statistics": lambda: client.get("/api/statistics"),
+        "create": create,
+        "update": lambda: client.put(f"/api/tasks/{rng.choice(task_ids)}", json={"status": "in_progress"}),
+        "delete": delete,
+        "reorder": reorder,
+        "bulk_toggle": bulk_toggle,
+        "execute": lambda: client.post(f"/api/tasks/{rng.choice(task_ids)}/execute"),
+        # Answered by the built-in parser
+        "parse_natural_language": lambda: client.post("/api/parse-natural-language",
+                                                      json={"input": "plan the quarterly report"}),
+        # Scores low locally, so it falls back to (fake) iFlow
+        "parse_natural_language_iflow": lambda: client.post(
+            "/api/parse-natural-language",
+            json={"input": "show me everything I said I'd get back to people about"}),
+    }
+
+
+def _measure(scenario, repeat: int, concurrency: int) -> dict:
+    """Latency of each call plus overall throughput, with concurrency calls in flight at a time."""
+    def timed(_):
+        start = time.perf_counter()
+        scenario()
+        return (time.perf_counter() - start) * 1000
+
+    start = time.perf_counter()
+    if concurrency == 1:
+        samples = [timed(i) for i in range(repeat)]
+    else:
+        with ThreadPoolExecutor(concurrency) as pool:
+            samples = list(pool.map(timed, range(repeat)))
+    elapsed = time.perf_counter() - start
+    return {**summarize(samples), "throughput_rps": round(len(samples) / elapsed, 1)}
+
+
+def _worker(size: int, repeat: int, concurrency):
+    """Run inside the child interpreter; prints one JSON result list."""
+    from fastapi.testclient import TestClient
+    from app.main import app
+
+    results = []
+    with TestClient(app) as client:
+        for name, scenario in _scenarios(client, random.Random(size)).items():
+            for clients in concurrency:
+                results.append({"scenario": name, "tasks": size, "concurrency": clients,
+                                **_measure(scenario, repeat, clients)})
+    print(json.dumps(results))
+
+
+def run(sizes, repeat: int = 20, iflow_latency: float = 0.05, concurrency=CONCURRENCY) -> list:
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as data_dir:
+            write_store(data_dir, size)
+            env = {
+                **os.environ,
+                "DATA_DIR": data_dir,
+                "IFLOW_COMMAND": str(FAKE_IFLOW),
+                "FAKE_IFLOW_LATENCY": str(iflow_latency),
+            }
+            output = subprocess.run(
+                [sys.executable, "-m", "benchmarks.bench_api", "--worker", str(size), "--repeat", str(repeat),
+                 "--concurrency", *(str(clients) for clients in concurrency)],
+                env=env, capture_output=True, text=True, check=True
+            ).stdout
+            results.extend(json.loads(output.strip().splitlines()[-1]))
+    return results
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.set_defaults(repeat=20)
+    parser.add_argument("--iflow-latency", type=float, default=0.05,
+                        help="seconds the fake iFlow CLI sleeps per call")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=list(CONCURRENCY),
+                        help="numbers of concurrent clients to run each scenario with")
+    parser.add_argument("--worker", type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.worker is not None:
+        _worker(args.worker, args.repeat, args.concurrency)
+        return
+    report(run(args.sizes, args.repeat, args.iflow_latency, args.concurrency),
+           ["scenario", "tasks", "concurrency", "p50_ms", "p95_ms", "mean_ms", "throughput_rps"],
+           args.output, "bench_api")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,58 @@
+"""Resident memory of the task store in different representations.
+
+Compares plain task dicts, validated Task models and the compact
+TaskRecord used by Storage. Run from the repository root:
+
+    python -m benchmarks.bench_memory [--sizes 10000 100000] [--output results.json]
+"""
+import gc
+import json
+import tracemalloc
+
+from app import serialization
+from app.models import Task
+from app.records import TaskTable
+from benchmarks.common import make_parser, report
+from benchmarks.synthetic import make_store
+
+REPRESENTATIONS = {
+    "dicts": lambda raw: serialization.loads(raw)["tasks"],
+    "task_models": lambda raw: [Task(**task) for task in serialization.loads(raw)["tasks"]],
+    "task_records": lambda raw: TaskTable(serialization.loads(raw)),
+}
+
+
+def _resident_bytes(build, raw: bytes) -> int:
+    gc.collect()
+    tracemalloc.start()
+    try:
+        baseline = tracemalloc.get_traced_memory()[0]
+        kept = build(raw)
+        gc.collect()
+        used = tracemalloc.get_traced_memory()[0] - baseline
+    finally:
+        tracemalloc.stop()
+    del kept
+    return used
+
+
+def run(sizes, repeat: int = 1) -> list:
+    results = []
+    for size in sizes:
+        raw = json.dumps(make_store(size)).encode("utf-8")
+        row = {"tasks": size}
+        for name, build in REPRESENTATIONS.items():
+            used = min(_resident_bytes(build, raw) for _ in range(repeat))
+            row[f"{name}_mib"] = round(used / 1024 / 1024, 1)
+        results.append(row)
+    return results
+
+
+def main():
+    args = make_parser(__doc__).parse_args()
+    columns = ["tasks"] + [f"{name}_mib" for name in REPRESENTATIONS]
+    report(run(args.sizes, args.repeat), columns, args.output, "bench_memory")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,57 @@
+"""Per-request CPU cost of the task list read path.
+
+Compares building and dumping a Task model for every stored dict (the
+original behaviour) with serving the resident task records directly.
+Run from the repository root:
+
+    python -m benchmarks.bench_reads [--sizes 1000 10000] [--output results.json]
+"""
+import json
+import time
+
+from fastapi.encoders import jsonable_encoder
+
+from app.models import Task
+from app import serialization
+from app.serialization import dumps_json
+from benchmarks.common import make_parser, report
+from benchmarks.synthetic import synthetic_storage
+
+
+def _cpu_ms(repeat: int, func) -> float:
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.process_time()
+        func()
+        best = min(best, time.process_time() - start)
+    return round(best * 1000, 2)
+
+
+def run(sizes, repeat: int = 3) -> list:
+    results = []
+    for size in sizes:
+        with synthetic_storage(size) as storage:
+            stored = serialization.read_file(storage.tasks_file)["tasks"]
+
+            def validated(stored=stored):
+                tasks = [Task(**task) for task in stored]
+                json.dumps(jsonable_encoder({"tasks": [task.model_dump() for task in tasks]}))
+
+            def records(storage=storage):
+                dumps_json({"tasks": [task.to_dict() for task in storage.get_task_records()]})
+
+            results.append({
+                "tasks": size,
+                "validated_ms": _cpu_ms(repeat, validated),
+                "records_ms": _cpu_ms(repeat, records),
+            })
+    return results
+
+
+def main():
+    args = make_parser(__doc__).parse_args()
+    report(run(args.sizes, args.repeat), ["tasks", "validated_ms", "records_ms"], args.output, "bench_reads")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,39 @@
+"""Load/save benchmarks for the tasks.json storage formats.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_serialization [--sizes 1000 10000] [--output results.json]
+"""
+from app import serialization
+from benchmarks.common import make_parser, measure, report
+from benchmarks.synthetic import make_store
+
+
+def run(sizes, repeat: int = 3) -> list:
+    results = []
+    for size in sizes:
+        data = make_store(size)
+        for name in serialization.CODECS:
+            try:
+                codec = serialization.get_codec(name)
+            except RuntimeError as e:
+                print(f"skipping {name}: {e}")
+                continue
+            raw = codec.dumps(data)
+            results.append({
+                "format": name,
+                "tasks": size,
+                "bytes": len(raw),
+                "save_ms": measure(codec.dumps, repeat, data)["min_ms"],
+                "load_ms": measure(serialization.loads, repeat, raw)["min_ms"],
+            })
+    return results
+
+
+def main():
+    args = make_parser(__doc__).parse_args()
+    report(run(args.sizes, args.repeat), ["format", "tasks", "bytes", "save_ms", "load_ms"], args.output, "bench_serialization")
+
+
+if __name__ == "__main__":
+    main()
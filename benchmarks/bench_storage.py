@@ -0,0 +1,68 @@
+"""Latency of Storage operations on synthetic stores.
+
+Run from the repository root:
+
+    python -m benchmarks.bench_storage [--sizes 1000 10000] [--repeat 20] [--output results.json]
+"""
+import random
+
+from app.models import TaskCreate, TaskUpdate, TaskStatus
+from app.storage import Storage
+from benchmarks.common import make_parser, measure, report
+from benchmarks.synthetic import synthetic_storage
+
+
+def _operations(storage: Storage, rng: random.Random) -> dict:
+    task_ids = [task.id for task in storage.get_task_records()]
+    created = []
+
+    def cold_load():
+        storage._invalidate_cache()
+        storage.warm_up()
+
+    def create():
+        created.append(storage.create_task(TaskCreate(title="Benchmark task", category="Work")).id)
+
+    def delete():
+        if created:
+            storage.delete_task(created.pop())
+
+    def reorder():
+        order = task_ids[:]
+        rng.shuffle(order)
+        storage.reorder_tasks(order)
+
+    return {
+        "cold_load": cold_load,
+        "list": storage.get_task_records,
+        "list_filtered": lambda: storage.get_task_records(category="Work", status=TaskStatus.pending),
+        "get": lambda: storage.get_task_record(rng.choice(task_ids)),
+        "search": lambda: storage.search_task_records("report"),
+        "due_range": storage.get_due_task_records,
+        "statistics": storage.get_statistics,
+        "create": create,
+        "update": lambda: storage.update_task(rng.choice(task_ids), TaskUpdate(status=TaskStatus.in_progress)),
+        "delete": delete,
+        "reorder": reorder,
+    }
+
+
+def run(sizes, repeat: int = 20) -> list:
+    results = []
+    for size in sizes:
+        with synthetic_storage(size) as storage:
+            for name, operation in _operations(storage, random.Random(size)).items():
+                results.append({"operation": name, "tasks": size, **measure(operation, repeat)})
+    return results
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.set_defaults(repeat=20)
+    args = parser.parse_args()
+    report(run(args.sizes, args.repeat), ["operation", "tasks", "p50_ms", "p95_ms", "mean_ms"],
+           args.output, "bench_storage")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,74 @@
+import argparse
+import json
+import platform
+import statistics
+import subprocess
+import sys
+import time
+from datetime import datetime
+from pathlib import Path
+
+from benchmarks.synthetic import SIZES
+
+# Result columns with these suffixes are measurements (lower is better, except
+# for HIGHER_IS_BETTER_SUFFIXES); the remaining columns identify the row when
+# comparing runs.
+HIGHER_IS_BETTER_SUFFIXES = ("_rps",)
+METRIC_SUFFIXES = ("_ms", "_mib", "bytes") + HIGHER_IS_BETTER_SUFFIXES
+
+
+def make_parser(doc: str) -> argparse.ArgumentParser:
+    """Argument parser with the options shared by all benchmark scripts."""
+    parser = argparse.ArgumentParser(description=doc.splitlines()[0])
+    parser.add_argument("--sizes", type=int, nargs="+", default=list(SIZES))
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--output", help="write results as JSON to this file")
+    return parser
+
+
+def measure(func, repeat: int, *args) -> dict:
+    """Call func repeat times and summarize its wall-clock latency in milliseconds."""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(*args)
+        samples.append((time.perf_counter() - start) * 1000)
+    return summarize(samples)
+
+
+def summarize(samples_ms: list) -> dict:
+    ordered = sorted(samples_ms)
+    return {
+        "min_ms": round(ordered[0], 3),
+        "p50_ms": round(statistics.median(ordered), 3),
+        "p95_ms": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 3),
+        "mean_ms": round(statistics.fmean(ordered), 3),
+    }
+
+
+def environment() -> dict:
+    """Where and on what commit the benchmarks ran, for comparing result files."""
+    try:
+        commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True,
+                                text=True, cwd=Path(__file__).parent).stdout.strip() or None
+    except OSError:
+        commit = None
+    return {
+        "commit": commit,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "timestamp": datetime.now().isoformat(timespec="seconds"),
+        "argv": sys.argv[1:],
+    }
+
+
+def report(results: list, columns: list, output: str = None, name: str = None):
+    """Print results as a table and optionally save them as JSON."""
+    widths = [max([10, len(column)] + [len(str(row[column])) for row in results]) + 2
+              for column in columns]
+    print("".join(f"{column:>{width}}" for column, width in zip(columns, widths)))
+    for row in results:
+        print("".join(f"{row[column]!s:>{width}}" for column, width in zip(columns, widths)))
+    if output:
+        with open(output, "w") as f:
+            json.dump({"benchmark": name, "environment": environment(), "results": results}, f, indent=2)
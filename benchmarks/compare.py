@@ -0,0 +1,82 @@
+"""Compare two benchmark result files and flag regressions.
+
+Rows are matched on their identifying columns (scenario, operation,
+format, tasks, ...) and every measurement column (*_ms, *_mib, bytes) is
+compared, lower being better; for throughput columns (*_rps) higher is
+better, and their ratio is baseline / candidate so that above 1 still
+means worse. Exits with status 1 if any measurement got
+worse by more than the threshold. Run from the repository root:
+
+    python -m benchmarks.compare baseline.json candidate.json [--threshold 0.10]
+"""
+import argparse
+import json
+import sys
+
+from benchmarks.common import HIGHER_IS_BETTER_SUFFIXES, METRIC_SUFFIXES
+
+
+def _load(path: str) -> dict:
+    with open(path) as f:
+        data = json.load(f)
+    # run_all writes several benchmarks into one file; single scripts write one
+    documents = data if isinstance(data, list) else [data]
+    rows = {}
+    for document in documents:
+        for row in document["results"]:
+            identity = tuple(sorted((k, v) for k, v in row.items() if not k.endswith(METRIC_SUFFIXES)))
+            rows[(document.get("benchmark"), identity)] = row
+    return rows
+
+
+def compare(baseline: dict, candidate: dict, threshold: float) -> list:
+    changes = []
+    for key, new_row in candidate.items():
+        old_row = baseline.get(key)
+        if old_row is None:
+            continue
+        benchmark, identity = key
+        for metric, new_value in new_row.items():
+            old_value = old_row.get(metric)
+            if not metric.endswith(METRIC_SUFFIXES) or not old_value:
+                continue
+            if metric.endswith(HIGHER_IS_BETTER_SUFFIXES):
+                if not new_value:
+                    continue
+                ratio = old_value / new_value
+            else:
+                ratio = new_value / old_value
+            changes.append({
+                "benchmark": benchmark,
+                "row": ", ".join(f"{k}={v}" for k, v in identity),
+                "metric": metric,
+                "baseline": old_value,
+                "candidate": new_value,
+                "ratio": round(ratio, 3),
+                "regression": ratio > 1 + threshold,
+            })
+    return changes
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("baseline")
+    parser.add_argument("candidate")
+    parser.add_argument("--threshold", type=float, default=0.10,
+                        help="relative slowdown that counts as a regression (default 0.10)")
+    parser.add_argument("--all", action="store_true", help="show unchanged measurements too")
+    args = parser.parse_args()
+
+    changes = compare(_load(args.baseline), _load(args.candidate), args.threshold)
+    regressions = [c for c in changes if c["regression"]]
+    for change in changes:
+        if args.all or change["regression"] or change["ratio"] < 1 - args.threshold:
+            marker = "REGRESSION" if change["regression"] else "improved" if change["ratio"] < 1 else ""
+            print(f"{change['benchmark']:<20} {change['row']:<40} {change['metric']:<10} "
+                  f"{change['baseline']:>10} -> {change['candidate']:>10} x{change['ratio']:<6} {marker}")
+    print(f"{len(changes)} measurements compared, {len(regressions)} regressions")
+    sys.exit(1 if regressions else 0)
+
+
+if __name__ == "__main__":
+    main()
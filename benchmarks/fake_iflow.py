@@ -0,0 +1,40 @@
+#!/usr/bin/env python3
+"""Stand-in for the iFlow CLI used by the API benchmarks.
+
+Accepts the same ``-p <prompt>`` invocation as iFlow, sleeps for
+FAKE_IFLOW_LATENCY seconds (default 0.05) and prints a canned answer for
+the kind of prompt it received. Point IFLOW_COMMAND at this file.
+"""
+import json
+import os
+import re
+import sys
+import time
+from datetime import datetime, timedelta
+
+
+def answer(prompt: str) -> str:
+    if "task scheduling assistant" in prompt:
+        start = datetime.now().replace(hour=9, minute=0, second=0, microsecond=0) + timedelta(days=1)
+        task_ids = re.findall(r'"id": "([^"]+)"', prompt)
+        return json.dumps({"schedules": [
+            {"task_id": task_id, "suggested_time": (start + timedelta(hours=2 * i)).isoformat()}
+            for i, task_id in enumerate(task_ids)
+        ]})
+    if "require modifying files" in prompt:
+        return "false"
+    if "natural language input" in prompt:
+        return json.dumps({"new_task": {"title": "Benchmark task", "priority": "high"}, "filter": {}, "sort": {}})
+    return "Task executed by fake iFlow."
+
+
+def main():
+    if len(sys.argv) < 3 or sys.argv[1] != "-p":
+        print("usage: fake_iflow.py -p <prompt>", file=sys.stderr)
+        sys.exit(2)
+    time.sleep(float(os.getenv("FAKE_IFLOW_LATENCY", "0.05")))
+    print(answer(sys.argv[2]))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,43 @@
+"""Run the whole benchmark suite and write one machine-readable result file.
+
+Run from the repository root, then compare two runs with benchmarks.compare:
+
+    python -m benchmarks.run_all --output bench-$(git rev-parse --short HEAD).json
+"""
+import json
+
+from benchmarks import bench_api, bench_memory, bench_reads, bench_serialization, bench_storage
+from benchmarks.common import environment, make_parser
+
+SUITE = {
+    "bench_serialization": bench_serialization,
+    "bench_memory": bench_memory,
+    "bench_reads": bench_reads,
+    "bench_storage": bench_storage,
+    "bench_api": bench_api,
+}
+
+
+def main():
+    parser = make_parser(__doc__)
+    parser.add_argument("--only", nargs="+", choices=list(SUITE), help="run only these benchmarks")
+    args = parser.parse_args()
+
+    documents = []
+    for name, module in SUITE.items():
+        if args.only and name not in args.only:
+            continue
+        print(f"== {name}")
+        results = module.run(args.sizes, args.repeat)
+        documents.append({"benchmark": name, "environment": environment(), "results": results})
+        print(f"{len(results)} results")
+
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(documents, f, indent=2)
+    else:
+        print(json.dumps(documents, indent=2))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,67 @@
+import random
+import tempfile
+import uuid
+from contextlib import contextmanager
+from datetime import datetime, timedelta
+from pathlib import Path
+
+from app import serialization
+from app.storage import Storage
+
+SIZES = (1_000, 10_000, 100_000)
+CATEGORIES = ["Work", "Personal", "Shopping", "Health", "Study", "Finance", "Home", "Travel"]
+WORDS = ["review", "report", "email", "meeting", "groceries", "plan", "call", "draft",
+         "budget", "doctor", "exam", "clean", "book", "flight", "invoice", "update"]
+
+
+def make_tasks(count: int, data_dir: str = "./data", seed: int = 42) -> list:
+    """Generate synthetic task dicts shaped like tasks.json records."""
+    rng = random.Random(seed)
+    now = datetime(2025, 1, 1, 9, 0, 0)
+    tasks = []
+    for _ in range(count):
+        task_id = str(uuid.UUID(int=rng.getrandbits(128), version=4))
+        created_at = now - timedelta(minutes=rng.randint(0, 60 * 24 * 365))
+        due_date = created_at + timedelta(hours=rng.randint(1, 24 * 60)) if rng.random() < 0.7 else None
+        tasks.append({
+            "id": task_id,
+            "title": " ".join(rng.choices(WORDS, k=rng.randint(2, 5))).capitalize(),
+            "description": " ".join(rng.choices(WORDS, k=rng.randint(0, 30))) or None,
+            "category": rng.choice(CATEGORIES),
+            "priority": rng.choice(["low", "medium", "high"]),
+            "status": rng.choice(["pending", "in_progress", "completed"]),
+            "due_date": due_date.isoformat() if due_date else None,
+            "created_at": created_at.isoformat(),
+            "folder_path": f"{data_dir}/task_folders/task_{task_id[:8]}",
+            "ai_suggested_time": None,
+            "has_ai_button": rng.random() < 0.2,
+        })
+    return tasks
+
+
+def make_store(count: int, data_dir: str = "./data", seed: int = 42) -> dict:
+    """Generate a full tasks.json payload."""
+    return {
+        "tasks": make_tasks(count, data_dir, seed),
+        "categories": [{"name": name, "color": "#007bff"} for name in CATEGORIES],
+    }
+
+
+def write_store(data_dir: Path, count: int, storage_format: str = "json", seed: int = 42) -> Path:
+    """Write a synthetic tasks.json into data_dir and return its path."""
+    data_dir = Path(data_dir)
+    data_dir.mkdir(parents=True, exist_ok=True)
+    tasks_file = data_dir / "tasks.json"
+    serialization.write_file(tasks_file, make_store(count, str(data_dir), seed),
+                             serialization.get_codec(storage_format))
+    return tasks_file
+
+
+@contextmanager
+def synthetic_storage(count: int, storage_format: str = "json", seed: int = 42):
+    """Storage over a temporary synthetic store, with its task table already loaded."""
+    with tempfile.TemporaryDirectory() as data_dir:
+        write_store(data_dir, count, storage_format, seed)
+        storage = Storage(data_dir, storage_format)
+        storage.warm_up()
+        yield storage
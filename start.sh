@@ -25,6 +25,11 @@ if [ ! -f ".env" ]; then
     echo "Please edit .env file and add your OpenAI API key if desired."
 fi
 
-# Start the application
+# Start the application; WORKERS=N runs N worker processes (auto-reload is only available with one)
+WORKERS=${WORKERS:-1}
 echo "Starting application on http://localhost:8000"
-python -m uvicorn app.main:app --reload --host 127.0.0.1 --port 8000
\ No newline at end of file
+if [ "$WORKERS" -gt 1 ]; then
+    python -m uvicorn app.main:app --workers "$WORKERS" --host 127.0.0.1 --port 8000
+else
+    python -m uvicorn app.main:app --reload --host 127.0.0.1 --port 8000
+fi
\ No newline at end of file
@@ -0,0 +1,93 @@
+from datetime import datetime
+
+import pytest
+
+from app import nl_parser
+
+# A Wednesday morning
+NOW = datetime(2025, 1, 8, 10, 0)
+CATEGORIES = ["Work", "Home", "Personal"]
+# Default of NL_PARSER_MIN_CONFIDENCE: inputs scoring below it go to the AI parser
+THRESHOLD = 0.7
+
+
+# (input, expected new_task fields other than description)
+NEW_TASKS = [
+    ("buy milk tomorrow high priority", {"title": "Buy milk", "priority": "high", "due_date": "2025-01-09T23:59:00"}),
+    ("remind me to call mom at 5", {"title": "Call mom", "due_date": "2025-01-08T17:00:00"}),
+    ("call mom at 5 o'clock", {"title": "Call mom", "due_date": "2025-01-08T17:00:00"}),
+    ("dentist 2025-01-20T03:30", {"title": "Dentist", "due_date": "2025-01-20T03:30:00"}),
+    ("meeting at 07:30", {"title": "Meeting", "due_date": "2025-01-09T07:30:00"}),
+    ("standup at 9:15", {"title": "Standup", "due_date": "2025-01-09T09:15:00"}),
+    ("pick up kids at 3:30", {"title": "Pick up kids", "due_date": "2025-01-08T15:30:00"}),
+    ("clean house sat", {"title": "Clean house", "due_date": "2025-01-11T23:59:00"}),
+    ("homework due mon", {"title": "Homework", "due_date": "2025-01-13T23:59:00"}),
+    ("book flights next thu", {"title": "Book flights", "due_date": "2025-01-09T23:59:00"}),
+    ("water plants friday", {"title": "Water plants", "due_date": "2025-01-10T23:59:00"}),
+    ("Pay rent on the 1st", {"title": "Pay rent", "due_date": "2025-02-01T23:59:00"}),
+    ("pay bills on the 31st", {"title": "Pay bills", "due_date": "2025-01-31T23:59:00"}),
+    ("call back in 2 hours", {"title": "Call back", "due_date": "2025-01-08T12:00:00"}),
+    ("go to gym in 30 minutes", {"title": "Go to gym", "due_date": "2025-01-08T10:30:00"}),
+    ("call the bank in an hour", {"title": "Call the bank", "due_date": "2025-01-08T11:00:00"}),
+    ("submit form by 5", {"title": "Submit form", "due_date": "2025-01-08T17:00:00"}),
+    ("submit form by 5 tomorrow", {"title": "Submit form", "due_date": "2025-01-09T17:00:00"}),
+    ("renew passport in 2 weeks", {"title": "Renew passport", "due_date": "2025-01-22T23:59:00"}),
+    # Category names inside a title are not categories
+    ("Work on slides", {"title": "Work on slides"}),
+    ("home improvement ideas", {"title": "Home improvement ideas"}),
+    ("buy sun cream", {"title": "Buy sun cream"}),
+    # Explicit categories
+    ("finish report in work", {"title": "Finish report", "category": "Work"}),
+    ("Work: prepare slides", {"title": "Prepare slides", "category": "Work"}),
+    ("#home fix the sink", {"title": "Fix the sink", "category": "Home"}),
+    ("plan trip in the personal list", {"title": "Plan trip", "category": "Personal"}),
+    ("buy paint category garden", {"title": "Buy paint", "category": "garden"}),
+]
+
+
+@pytest.mark.parametrize("text, expected", NEW_TASKS)
+def test_new_task(text, expected):
+    result, confidence = nl_parser.parse(text, CATEGORIES, NOW)
+    task = dict(result["new_task"])
+    assert task.pop("description") == text
+    assert task == expected
+    assert confidence >= THRESHOLD
+
+
+# Inputs the local parser cannot represent fully, left to the AI parser
+UNSURE = [
+    "water the plants every monday",
+    "call the plumber unless it rains",
+    "read the 2nd chapter",
+    "meet at the cafe at 3 or 4",
+    "write a long summary of everything we discussed in the meeting yesterday afternoon",
+    "pay bills on 2/30",
+    "set alarm at 25:00",
+]
+
+
+@pytest.mark.parametrize("text", UNSURE)
+def test_falls_back_below_threshold(text):
+    _, confidence = nl_parser.parse(text, CATEGORIES, NOW)
+    assert confidence < THRESHOLD
+
+
+# (input, expected filter, expected sort)
+QUERIES = [
+    ("show completed work tasks", {"status": "completed", "category": "Work"}, {}),
+    ("show high priority tasks", {"priority": "high"}, {}),
+    ("show tasks due mon", {"due_from": "2025-01-13", "due_to": "2025-01-13"}, {}),
+    ("show tasks due this week", {"due_from": "2025-01-06", "due_to": "2025-01-12"}, {}),
+    ("find tasks containing Budget", {"search": "Budget"}, {}),
+    ("sort by due date newest first", {}, {"by": "due_date", "order": "desc"}),
+    ("sort by priority", {}, {"by": "priority"}),
+]
+
+
+@pytest.mark.parametrize("text, expected_filter, expected_sort", QUERIES)
+def test_query(text, expected_filter, expected_sort):
+    result, confidence = nl_parser.parse(text, CATEGORIES, NOW)
+    assert not result["new_task"]
+    assert result["filter"] == expected_filter
+    assert result["sort"] == expected_sort
+    assert confidence >= THRESHOLD